@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -30,3 +31,34 @@ for env in environments:
     plt.tight_layout()
     plt.savefig(os.path.join(output_dir, f"{env}_score_steps_comparison.png"))
     plt.show()
+
+# Convergence des solveurs : score moyen à côté du résidu de Bellman par balayage
+# (les journaux sont des tableaux structurés écrits par agents.convergence_log.ConvergenceLog.save)
+if "convergence_log" in df.columns:
+    for env in environments:
+        subset = df[(df["env"] == env) & df["convergence_log"].notna()]
+        if subset.empty:
+            continue
+        fig, (ax_score, ax_res) = plt.subplots(1, 2, figsize=(14, 6))
+
+        sns.barplot(data=subset, x="agent", y="mean_score", ax=ax_score, palette="Set2")
+        ax_score.set_title(f"Score moyen dans {env}")
+
+        # Une courbe par agent, pour le gamma le plus grand et le theta le plus petit
+        hardest = subset[(subset["gamma"] == subset["gamma"].max()) & (subset["theta"] == subset["theta"].min())]
+        for _, row in hardest.iterrows():
+            if not os.path.exists(row["convergence_log"]):
+                continue
+            records = np.load(row["convergence_log"])
+            ax_res.semilogy(records["residual"], label=row["agent"])
+            changes = records["policy_changes"] > 0
+            ax_res.scatter(changes.nonzero()[0], records["residual"][changes], s=10)
+        ax_res.set_title(f"Résidu de Bellman par balayage (gamma={hardest['gamma'].max()}, "
+                         f"theta={hardest['theta'].min()})")
+        ax_res.set_xlabel("Balayage")
+        ax_res.set_ylabel("Résidu max")
+        ax_res.legend()
+
+        plt.tight_layout()
+        plt.savefig(os.path.join(output_dir, f"{env}_convergence.png"))
+        plt.show()
@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+
+__all__ = ["ConvergenceLog"]
+
+PHASES = ("evaluation", "improvement", "backup")
+
+_LOG_DTYPE = np.dtype([
+    ("phase", np.int8),  # indice dans PHASES
+    ("residual", np.float64),  # résidu de Bellman max du balayage
+    ("states_changed", np.int64),  # états dont la valeur a bougé d'au moins theta
+    ("policy_changes", np.int64),  # états dont l'action gloutonne a changé
+    ("wall_time", np.float64),  # durée depuis l'enregistrement précédent (s), 0 pour le premier
+])
+
+
+class ConvergenceLog:
+    # Journal compact (tableau structuré) passé comme callback aux solveurs DP : un enregistrement par balayage.
+    # L'horloge démarre au premier appel : le temps écoulé avant (construction du modèle, compilation, premier
+    # balayage) est gardé à part dans setup_time et n'entre pas dans les wall_time.
+    def __init__(self, capacity=256):
+        self._data = np.zeros(capacity, dtype=_LOG_DTYPE)
+        self.size = 0
+        self._created = time.perf_counter()
+        self._last = None
+        self.setup_time = None
+
+    def __call__(self, phase, residual, states_changed, policy_changes=0):
+        now = time.perf_counter()
+        if self._last is None:
+            self.setup_time = now - self._created
+            self._last = now
+        if self.size == len(self._data):
+            self._data = np.concatenate((self._data, np.zeros(len(self._data), dtype=_LOG_DTYPE)))
+        self._data[self.size] = (PHASES.index(phase), residual, states_changed, policy_changes, now - self._last)
+        self.size += 1
+        self._last = now
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def records(self):
+        return self._data[:self.size]
+
+    def sweeps_to(self, theta):
+        # Nombre de balayages nécessaires pour passer sous theta (None si jamais atteint)
+        below = np.flatnonzero(self.records["residual"] < theta)
+        return int(below[0]) + 1 if below.size else None
+
+    def head(self, n):
+        # Copie limitée aux n premiers balayages
+        n = min(n, self.size)
+        log = ConvergenceLog(capacity=max(n, 1))
+        log._data[:n] = self.records[:n]
+        log.size = n
+        return log
+
+    def summary(self):
+        records = self.records
+        return {
+            "sweeps": int(self.size),
+            "final_residual": float(records["residual"][-1]) if self.size else None,
+            "policy_changes": int(records["policy_changes"].sum()),
+            "solver_time": float(records["wall_time"].sum()),
+            "setup_time": self.setup_time,
+        }
+
+    def to_dataframe(self):
+        import pandas as pd
+        df = pd.DataFrame(self.records)
+        df["phase"] = [PHASES[i] for i in df["phase"]]
+        df["cumulative_time"] = df["wall_time"].cumsum()
+        return df
+
+    def save(self, path):
+        np.save(path, self.records)
+
+    @classmethod
+    def load(cls, path):
+        records = np.load(path)
+        log = cls(capacity=max(len(records), 1))
+        log._data[:len(records)] = records
+        log.size = len(records)
+        return log
@@ -1,6 +1,39 @@
-def policy_iteration(env, gamma=0.99, theta=1e-6):
+import heapq
+import time
+
+import numpy as np
+
+from agents.mdp_model import CSRMatrix, DenseMDP, as_model
+
+try:
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+except ImportError:  # scipy est optionnel : on retombe sur l'évaluation itérative
+    sp = None
+    spla = None
+
+__all__ = ["policy_iteration", "value_iteration", "modified_policy_iteration",
+           "prioritized_sweeping_value_iteration", "backward_induction", "batched_value_iteration",
+           "theta_continuation", "evaluate_policy_model"]
+
+# Seuils de choix automatique du mode d'évaluation de la politique
+DIRECT_DENSE_MAX_STATES = 2_000
+DIRECT_SPARSE_MAX_STATES = 100_000
+# En mode auto, nombre de balayages tentés (démarrage à chaud) avant de passer à la résolution linéaire
+AUTO_EVAL_SWEEPS = 20
+# Profondeur maximale d'évaluation en itération de politique modifiée adaptative
+MPI_MAX_SWEEPS = 128
+# Marge numérique en deçà de laquelle une action n'est pas éliminée
+ELIMINATION_TOL = 1e-10
+
+
+def _policy_iteration_python(env, gamma, theta, initial_V=None, initial_policy=None):
     V = {s: 0.0 for s in env.get_states()}
     policy = {s: (env.get_actions(s)[0] if env.get_actions(s) else None) for s in env.get_states()}
+    if initial_V is not None:
+        V.update({s: v for s, v in initial_V.items() if s in V and not env.is_terminal(s)})
+    if initial_policy is not None:
+        policy.update({s: a for s, a in initial_policy.items() if s in policy and a in env.get_actions(s)})
 
     while True:
         # Évaluation de la politique actuelle
@@ -36,8 +69,10 @@ def policy_iteration(env, gamma=0.99, theta=1e-6):
     return policy, V
 
 
-def value_iteration(env, gamma=0.99, theta=1e-5):
+def _value_iteration_python(env, gamma, theta, initial_V=None):
     V = {s: 0.0 for s in env.get_states()}
+    if initial_V is not None:
+        V.update({s: v for s, v in initial_V.items() if s in V and not env.is_terminal(s)})
     policy = {}
 
     while True:
@@ -64,3 +99,502 @@ def value_iteration(env, gamma=0.99, theta=1e-5):
         policy[s] = best_action
 
     return policy, V
+
+
+def _report_residuals(callback, phase, residuals, theta, policy_changes=0):
+    # Envoie les statistiques d'un balayage au callback de télémétrie ; renvoie le résidu max
+    delta = np.max(residuals) if residuals.size else 0.0
+    if callback is not None:
+        callback(phase, float(delta), int(np.count_nonzero(residuals >= theta)), int(policy_changes))
+    return delta
+
+
+def _report(callback, phase, V_old, V_new, theta, policy_changes=0):
+    return _report_residuals(callback, phase, np.abs(V_new - V_old), theta, policy_changes)
+
+
+def _state_order(model, ordering, residuals=None, cache=None):
+    # Ordre de parcours des états non terminaux pour les balayages de Gauss-Seidel
+    if isinstance(ordering, str):
+        if ordering == "index" or (ordering == "residual" and residuals is None):
+            order = np.arange(model.num_states)
+        elif ordering == "residual":
+            order = np.argsort(-residuals, kind="stable")  # résidu du balayage précédent décroissant
+        elif ordering == "reverse_bfs":
+            if cache is not None and "reverse_bfs" in cache:
+                return cache["reverse_bfs"]
+            order = model.reverse_bfs_order()
+        else:
+            raise ValueError(f"Ordre de balayage inconnu : {ordering}")
+    else:
+        order = np.asarray(ordering)
+    order = order[~model.terminal[order]]
+    if cache is not None and ordering == "reverse_bfs":
+        cache["reverse_bfs"] = order
+    return order
+
+
+def _row_dot(P, s, V):
+    return P.row_dot(s, V) if isinstance(P, CSRMatrix) else P[s] @ V
+
+
+def _evaluate_policy_iterative(P_pi, R_pi, V, gamma, theta, max_sweeps=None, callback=None, order_fn=None):
+    # Balayages de Jacobi (vectorisés) ou, si order_fn est fourni, de Gauss-Seidel (en place, dans l'ordre donné)
+    sweeps = 0
+    residuals = None
+    if order_fn is not None:
+        V = V.copy()
+    while max_sweeps is None or sweeps < max_sweeps:
+        if order_fn is None:
+            V_new = R_pi + gamma * (P_pi @ V)
+            delta = _report(callback, "evaluation", V, V_new, theta)
+            V = V_new
+        else:
+            order = order_fn(residuals)  # résidus du balayage précédent (None au premier)
+            residuals = np.zeros(V.size)
+            for s in order:
+                v = R_pi[s] + gamma * _row_dot(P_pi, s, V)
+                residuals[s] = abs(v - V[s])
+                V[s] = v
+            delta = _report_residuals(callback, "evaluation", residuals, theta)
+        sweeps += 1
+        if delta < theta:
+            return V, True
+    return V, False
+
+
+def _gauss_seidel_backup(model, V, gamma, order):
+    # Un balayage de Bellman en place ; renvoie le résidu de chaque état
+    residuals = np.zeros(model.num_states)
+    for s in order:
+        v = np.max(model.state_q_values(s, V, gamma))
+        residuals[s] = abs(v - V[s])
+        V[s] = v
+    return residuals
+
+
+def _evaluate_policy_direct(P_pi, R_pi, gamma):
+    # Résout directement (I - gamma P_pi) V = R_pi
+    if isinstance(P_pi, CSRMatrix):
+        A = sp.identity(P_pi.shape[0], format="csc") - gamma * P_pi.to_scipy().tocsc()
+        return spla.spsolve(A, R_pi)
+    return np.linalg.solve(np.eye(P_pi.shape[0]) - gamma * P_pi, R_pi)
+
+
+def _evaluate_policy_krylov(P_pi, R_pi, V, gamma, theta):
+    M = P_pi.to_scipy() if isinstance(P_pi, CSRMatrix) else sp.csr_matrix(P_pi)
+    A = sp.identity(M.shape[0], format="csr") - gamma * M
+    V_new, info = spla.bicgstab(A, R_pi, x0=V, rtol=0.0, atol=theta)
+    if info != 0:
+        V_new, info = spla.gmres(A, R_pi, x0=V_new, rtol=0.0, atol=theta, restart=50)
+    return V_new, info == 0
+
+
+def _select_solver(model):
+    # Solveur linéaire adapté à la taille du modèle
+    if model.num_states <= DIRECT_DENSE_MAX_STATES and isinstance(model, DenseMDP):
+        return "direct"
+    if sp is None:
+        return "iterative"
+    return "direct" if model.num_states <= DIRECT_SPARSE_MAX_STATES else "krylov"
+
+
+def _sweep_order_fn(model, sweep, ordering):
+    if sweep == "jacobi":
+        return None
+    if sweep != "gauss_seidel":
+        raise ValueError(f"Mode de balayage inconnu : {sweep}")
+    cache = {}
+    return lambda residuals: _state_order(model, ordering, residuals, cache)
+
+
+def evaluate_policy_model(model, policy, gamma, theta, V=None, evaluation="auto", callback=None,
+                          sweep="jacobi", ordering="index"):
+    # Évalue une politique (tableau d'indices d'actions) sur un modèle compilé
+    P_pi, R_pi = model.policy_model(policy)
+    V = np.zeros(model.num_states) if V is None else V
+    order_fn = _sweep_order_fn(model, sweep, ordering)
+    mode = evaluation
+    if mode == "auto":
+        # Quelques balayages suffisent souvent quand V est déjà proche (démarrage à chaud)
+        V, converged = _evaluate_policy_iterative(P_pi, R_pi, V, gamma, theta, AUTO_EVAL_SWEEPS, callback,
+                                                  order_fn)
+        if converged:
+            return V
+        mode = _select_solver(model)
+    if mode not in ("direct", "krylov", "iterative"):
+        raise ValueError(f"Mode d'évaluation inconnu : {evaluation}")
+    if sp is None and (mode == "krylov" or (mode == "direct" and isinstance(P_pi, CSRMatrix))):
+        mode = "iterative"
+
+    if mode == "direct":
+        try:
+            V_new = _evaluate_policy_direct(P_pi, R_pi, gamma)
+            if np.all(np.isfinite(V_new)):
+                _report(callback, "evaluation", V, V_new, theta)
+                return V_new
+        except (np.linalg.LinAlgError, RuntimeError):
+            pass  # système singulier (gamma = 1 et politique impropre) : on itère
+    elif mode == "krylov":
+        V_new, converged = _evaluate_policy_krylov(P_pi, R_pi, V, gamma, theta)
+        _report(callback, "evaluation", V, V_new, theta)
+        if converged:
+            return V_new
+        V = V_new
+
+    return _evaluate_policy_iterative(P_pi, R_pi, V, gamma, theta, callback=callback, order_fn=order_fn)[0]
+
+
+def _improve_policy(model, V, gamma, policy):
+    # Politique gloutonne ; on ne change d'action que si l'amélioration est stricte (évite les oscillations)
+    greedy, Q = model.greedy_actions(V, gamma)
+    idx = np.arange(model.num_states)
+    current = Q[idx, np.where(model.terminal, 0, policy)]
+    best = Q[idx, np.where(model.terminal, 0, greedy)]
+    changed = ~model.terminal & (best > current + 1e-12)
+    return np.where(changed, greedy, policy), changed, Q
+
+
+def _solve_acyclic(model, gamma, theta=0.0, callback=None):
+    # Une seule passe en ordre topologique inverse : chaque état est calculé après tous ses successeurs
+    V = np.zeros(model.num_states)
+    policy = np.full(model.num_states, -1)
+    for level in model.topological_levels():
+        level = level[~model.terminal[level]]
+        if level.size:
+            Q = model.states_q_values(level, V, gamma)
+            policy[level] = np.argmax(Q, axis=1)
+            V[level] = np.max(Q, axis=1)
+    _report(callback, "backup", np.zeros(model.num_states), V, theta, np.count_nonzero(~model.terminal))
+    return policy, V
+
+
+def backward_induction(env, gamma=0.99, theta=1e-5, backend="auto", callback=None):
+    # Solveur exact pour les MDP acycliques (horizon fini) ; value_iteration sinon
+    model = as_model(env, backend)
+    if not model.is_acyclic():
+        return value_iteration(model, gamma, theta, callback=callback)
+    policy, V = _solve_acyclic(model, gamma, theta, callback)
+    return model.policy_to_dict(policy), model.values_to_dict(V)
+
+
+def _initial_values(model, gamma, theta, initial_V, initial_policy):
+    # Démarrage à chaud : V fourni, sinon valeur de la politique fournie, sinon 0
+    if initial_V is not None:
+        return model.values_from(initial_V)
+    if initial_policy is not None:
+        return evaluate_policy_model(model, model.policy_from(initial_policy), gamma, theta)
+    return np.zeros(model.num_states)
+
+
+def _evaluate_policy_shared(engine, policy, V, gamma, theta, callback=None):
+    # Évaluation itérative (Jacobi) répartie sur le pool de l'exécuteur
+    engine.load_policy(policy)
+    engine.load_values(V)
+    while True:
+        delta, _, _, changed = engine.sweep(gamma, theta, evaluation=True)
+        if callback is not None:
+            callback("evaluation", float(delta), changed, 0)
+        if delta < theta:
+            return engine.values()
+
+
+def policy_iteration(env, gamma=0.99, theta=1e-6, backend="auto", evaluation="auto",
+                     initial_V=None, initial_policy=None, callback=None, sweep="jacobi", ordering="index",
+                     executor=None):
+    # executor (ex. SharedMemoryExecutor) : évaluation par balayages de Jacobi répartis sur plusieurs processus
+    if executor is not None and sweep != "jacobi":
+        raise ValueError("Un exécuteur parallèle n'accepte que les balayages de Jacobi")
+    if backend == "python":
+        if callback is not None or executor is not None:
+            raise ValueError("Le backend 'python' n'accepte ni callback ni executor")
+        return _policy_iteration_python(env, gamma, theta, initial_V, initial_policy)
+
+    model = as_model(env, backend)
+    if model.is_acyclic():
+        policy, V = _solve_acyclic(model, gamma, theta, callback)
+        return model.policy_to_dict(policy, include_terminal=True), model.values_to_dict(V)
+
+    V = np.zeros(model.num_states) if initial_V is None else model.values_from(initial_V)
+    policy = model.first_valid_actions() if initial_policy is None else model.policy_from(initial_policy)
+    engine = executor.attach(model) if executor is not None else None
+    try:
+        return _policy_iteration_loop(model, policy, V, gamma, theta, evaluation, callback, sweep, ordering, engine)
+    finally:
+        if engine is not None:
+            engine.close()
+
+
+def _policy_iteration_loop(model, policy, V, gamma, theta, evaluation, callback, sweep, ordering, engine):
+    while True:
+        # Évaluation de la politique actuelle
+        if engine is not None:
+            V = _evaluate_policy_shared(engine, policy, V, gamma, theta, callback)
+        else:
+            V = evaluate_policy_model(model, policy, gamma, theta, V, evaluation, callback, sweep, ordering)
+
+        # Amélioration de la politique
+        policy, changed, Q = _improve_policy(model, V, gamma, policy)
+        if callback is not None:
+            residual = np.max(np.abs(np.where(model.terminal, 0.0, np.max(Q, axis=1)) - V), initial=0.0)
+            callback("improvement", float(residual), int(changed.sum()), int(changed.sum()))
+        if not changed.any():
+            break
+
+    return model.policy_to_dict(policy, include_terminal=True), model.values_to_dict(V)
+
+
+def _macqueen_bounds(V_old, V_new, gamma):
+    # Bornes de MacQueen : V_new + low <= V* <= V_new + up
+    diff = V_new - V_old
+    scale = gamma / (1.0 - gamma)
+    return scale * np.min(diff), scale * np.max(diff)
+
+
+def _value_iteration_shared(model, executor, V, gamma, theta, callback, stopping):
+    # Balayages de Jacobi répartis : seuls les résidus (min, max, nombre) remontent à chaque balayage
+    with executor.attach(model) as engine:
+        engine.load_values(V)
+        while True:
+            delta, low, up, changed = engine.sweep(gamma, theta)
+            if callback is not None:
+                callback("backup", float(delta), changed, 0)
+            scale = gamma / (1.0 - gamma) if stopping == "span" else 0.0
+            if (scale * (up - low) if stopping == "span" else delta) < theta:
+                break
+        V = engine.values()
+    policy, _ = model.greedy_actions(V, gamma)
+    if stopping == "span":
+        V = np.where(model.terminal, 0.0, V + scale * (low + up) / 2)
+    return policy, V
+
+
+def value_iteration(env, gamma=0.99, theta=1e-5, backend="auto", initial_V=None, initial_policy=None,
+                    callback=None, sweep="jacobi", ordering="index", eliminate_actions=False, stopping="sup",
+                    executor=None):
+    # sweep="jacobi" : mise à jour synchrone vectorisée ; sweep="gauss_seidel" : mise à jour en place,
+    # dans l'ordre ordering ("index", "reverse_bfs", "residual" ou tableau d'indices d'états)
+    # stopping="span" : arrêt quand gamma / (1 - gamma) * sp(V_new - V) < theta, la politique gloutonne
+    # est alors theta-optimale ; eliminate_actions retire définitivement les actions dont la borne
+    # supérieure de Q* passe sous la borne inférieure de V* (balayages de Jacobi uniquement)
+    # executor (ex. SharedMemoryExecutor) : balayages de Jacobi répartis par partitions d'états
+    if stopping not in ("sup", "span"):
+        raise ValueError(f"Critère d'arrêt inconnu : {stopping}")
+    if (eliminate_actions or stopping == "span") and (sweep != "jacobi" or gamma >= 1.0):
+        raise ValueError("L'élimination d'actions et l'arrêt par semi-norme d'envergure demandent "
+                         "des balayages de Jacobi et gamma < 1")
+    if backend == "python":
+        if callback is not None or executor is not None or eliminate_actions or stopping != "sup":
+            raise ValueError("Le backend 'python' n'accepte ni callback, ni executor, ni élimination d'actions, "
+                             "ni arrêt par semi-norme d'envergure")
+        return _value_iteration_python(env, gamma, theta, initial_V)
+
+    model = as_model(env, backend)
+    if model.is_acyclic():
+        policy, V = _solve_acyclic(model, gamma, theta, callback)
+        return model.policy_to_dict(policy), model.values_to_dict(V)
+
+    V = _initial_values(model, gamma, theta, initial_V, initial_policy)
+    if executor is not None:
+        if sweep != "jacobi" or eliminate_actions:
+            raise ValueError("Un exécuteur parallèle n'accepte que les balayages de Jacobi sans élimination")
+        policy, V = _value_iteration_shared(model, executor, V, gamma, theta, callback, stopping)
+        return model.policy_to_dict(policy), model.values_to_dict(V)
+
+    order_fn = _sweep_order_fn(model, sweep, ordering)
+    if order_fn is not None:
+        policy, V = _value_iteration_gauss_seidel(model, V, gamma, theta, callback, order_fn)
+    else:
+        policy, V = _value_iteration_jacobi(model, V, gamma, theta, callback, eliminate_actions, stopping)
+    return model.policy_to_dict(policy), model.values_to_dict(V)
+
+
+def _value_iteration_gauss_seidel(model, V, gamma, theta, callback, order_fn):
+    # Balayages en place dans l'ordre donné par order_fn (résidus du balayage précédent, None au premier)
+    residuals = None
+    while True:
+        residuals = _gauss_seidel_backup(model, V, gamma, order_fn(residuals))
+        if _report_residuals(callback, "backup", residuals, theta) < theta:
+            break
+    policy, _ = model.greedy_actions(V, gamma)
+    return policy, V
+
+
+def _value_iteration_jacobi(model, V, gamma, theta, callback, eliminate_actions, stopping):
+    previous = None
+    active = model.mask.copy()
+    if eliminate_actions:
+        # Seuls les couples (s, a) encore actifs sont calculés : le coût d'un balayage décroît
+        rows = np.flatnonzero(active.ravel())
+        P_rows, R_rows = model.transition_rows(rows), model.R.ravel()[rows]
+
+    while True:
+        if eliminate_actions:
+            Q = np.full(active.size, -np.inf)
+            Q[rows] = R_rows + gamma * (P_rows @ V)
+            Q = Q.reshape(active.shape)
+        else:
+            Q = model.q_values(V, gamma)
+        V_new = np.where(model.terminal, 0.0, np.max(Q, axis=1))
+        changes = 0
+        if callback is not None:
+            greedy = np.argmax(Q, axis=1)
+            changes = 0 if previous is None else np.count_nonzero(greedy != previous)
+            previous = greedy
+        delta = _report(callback, "backup", V, V_new, theta, changes)
+        if stopping == "span" or eliminate_actions:
+            low, up = _macqueen_bounds(V, V_new, gamma)
+        if eliminate_actions:
+            # Q*(s, a) <= Q(s, a; V) + up et V*(s) >= V_new(s) + low
+            eliminated = active & (Q + up < (V_new + low)[:, None] - ELIMINATION_TOL)
+            if eliminated.any():
+                active &= ~eliminated
+                kept = active.ravel()[rows]
+                rows = rows[kept]
+                P_rows, R_rows = P_rows.select_rows(np.flatnonzero(kept)) if isinstance(P_rows, CSRMatrix) \
+                    else P_rows[kept], R_rows[kept]
+        V = V_new
+        if (up - low if stopping == "span" else delta) < theta:
+            break
+
+    policy, Q = model.greedy_actions(V, gamma)
+    if eliminate_actions:
+        policy = np.where(model.terminal, -1, np.argmax(np.where(active, Q, -np.inf), axis=1))
+    if stopping == "span":
+        # Milieu de l'encadrement : |V - V*| <= theta / 2
+        V = np.where(model.terminal, 0.0, V + (low + up) / 2)
+    return policy, V
+
+
+def modified_policy_iteration(env, gamma=0.99, theta=1e-5, backend="auto", k=5,
+                              initial_V=None, initial_policy=None, callback=None):
+    # k balayages d'évaluation par amélioration ; k="adaptive" double k tant que la politique est stable
+    if k != "adaptive" and (not isinstance(k, int) or k < 1):
+        raise ValueError("k doit être un entier >= 1 ou 'adaptive'")
+
+    model = as_model(env, backend)
+    if model.is_acyclic():
+        policy, V = _solve_acyclic(model, gamma, theta, callback)
+        return model.policy_to_dict(policy), model.values_to_dict(V)
+
+    V = _initial_values(model, gamma, theta, initial_V, initial_policy)
+    policy = None
+    depth = 1 if k == "adaptive" else k
+
+    while True:
+        # Amélioration : la mise à jour gloutonne compte comme le premier balayage d'évaluation
+        greedy, Q = model.greedy_actions(V, gamma)
+        V_new = np.where(model.terminal, 0.0, np.max(Q, axis=1))
+        changes = 0 if policy is None else np.count_nonzero(greedy != policy)
+        delta = _report(callback, "backup", V, V_new, theta, changes)
+        V = V_new
+        if delta < theta:
+            break
+
+        if k == "adaptive" and policy is not None:
+            depth = min(2 * depth, MPI_MAX_SWEEPS) if np.array_equal(greedy, policy) else max(1, depth // 2)
+        policy = greedy
+
+        # Évaluation partielle : depth - 1 balayages supplémentaires avec la politique fixée
+        if depth > 1:
+            P_pi, R_pi = model.policy_model(policy)
+            V, _ = _evaluate_policy_iterative(P_pi, R_pi, V, gamma, theta, depth - 1, callback)
+
+    policy, _ = model.greedy_actions(V, gamma)
+    return model.policy_to_dict(policy), model.values_to_dict(V)
+
+
+def prioritized_sweeping_value_iteration(env, gamma=0.99, theta=1e-5, backend="auto"):
+    # Itération sur les valeurs asynchrone : seuls les états dont l'erreur de Bellman dépasse theta sont
+    # mis à jour, par ordre de priorité. Renvoie aussi le nombre de mises à jour d'état effectuées.
+    model = as_model(env, backend)
+    pred_indptr, pred_states, pred_weights = model.predecessors()
+    V = np.zeros(model.num_states)
+
+    # La priorité est un majorant de l'erreur de Bellman de chaque état
+    priority = np.where(model.terminal, 0.0, np.abs(np.max(model.q_values(V, gamma), axis=1) - V))
+    heap = [(-p, s) for s, p in enumerate(priority) if p >= theta]
+    heapq.heapify(heap)
+    backups = 0
+
+    while heap:
+        neg_p, s = heapq.heappop(heap)
+        if -neg_p != priority[s]:
+            continue  # entrée périmée
+        priority[s] = 0.0
+        new_v = np.max(model.state_q_values(s, V, gamma))
+        change = abs(new_v - V[s])
+        V[s] = new_v
+        backups += 1
+        if change == 0.0:
+            continue
+
+        start, end = pred_indptr[s], pred_indptr[s + 1]
+        for p, w in zip(pred_states[start:end], pred_weights[start:end]):
+            priority[p] += gamma * w * change
+            if priority[p] >= theta:
+                heapq.heappush(heap, (-priority[p], p))
+
+    policy, _ = model.greedy_actions(V, gamma)
+    return model.policy_to_dict(policy), model.values_to_dict(V), backups
+
+
+def batched_value_iteration(env, gammas, theta=1e-5, backend="auto", callbacks=None):
+    # Itération sur les valeurs pour plusieurs gamma à la fois sur un seul modèle compilé : V est de forme (G, S).
+    # theta peut être une liste : chaque (gamma, theta) est capturé au balayage où value_iteration s'arrêterait.
+    # callbacks : {gamma: callback} optionnel. Renvoie {(gamma, theta): (policy, V)}.
+    model = as_model(env, backend)
+    gammas = np.asarray(gammas, dtype=float)
+    thetas = sorted(np.atleast_1d(theta).tolist(), reverse=True)
+    callbacks = callbacks or {}
+    results = {}
+
+    if model.is_acyclic():
+        for gamma in gammas.tolist():
+            policy, V = _solve_acyclic(model, gamma, thetas[-1], callbacks.get(gamma))
+            for t in thetas:
+                results[(gamma, t)] = (model.policy_to_dict(policy), model.values_to_dict(V))
+        return results
+
+    V = np.zeros((len(gammas), model.num_states))
+    active = np.arange(len(gammas))
+    next_theta = np.zeros(len(gammas), dtype=int)  # prochain theta à capturer pour chaque gamma
+    previous = {}  # dernières actions gloutonnes, pour la télémétrie
+
+    while active.size:
+        g = gammas[active]
+        Q = model.R[:, :, None] + g * model.expected_next_values(V[active].T)
+        Q = np.where(model.mask[:, :, None], Q, -np.inf)
+        V_new = np.where(model.terminal[:, None], 0.0, np.max(Q, axis=1)).T
+        delta = np.max(np.abs(V_new - V[active]), axis=1) if model.num_states else np.zeros(active.size)
+        for row, i in enumerate(active):
+            callback = callbacks.get(gammas[i].item())
+            if callback is not None:
+                greedy = np.argmax(Q[:, :, row], axis=1)
+                changes = np.count_nonzero(greedy != previous[i]) if i in previous else 0
+                previous[i] = greedy
+                _report(callback, "backup", V[i], V_new[row], thetas[-1], changes)
+        V[active] = V_new
+
+        for row, i in enumerate(active):
+            while next_theta[i] < len(thetas) and delta[row] < thetas[next_theta[i]]:
+                policy, _ = model.greedy_actions(V[i], gammas[i])
+                results[(gammas[i].item(), thetas[next_theta[i]])] = (
+                    model.policy_to_dict(policy), model.values_to_dict(V[i]))
+                next_theta[i] += 1
+        active = active[next_theta[active] < len(thetas)]
+
+    return results
+
+
+def theta_continuation(solver, env, thetas, gamma=0.99, backend="auto", **kwargs):
+    # Resserre theta pas à pas en repartant de la solution précédente ; chaque étape ne paie que
+    # les balayages supplémentaires. Renvoie l'historique des solutions intermédiaires.
+    model = as_model(env, backend)
+    policy, V = None, None
+    history = []
+    for theta in sorted(thetas, reverse=True):
+        start = time.time()
+        policy, V = solver(model, gamma=gamma, theta=theta, initial_V=V, initial_policy=policy, **kwargs)
+        history.append({"theta": theta, "policy": policy, "V": V, "time": time.time() - start})
+    return history
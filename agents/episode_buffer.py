@@ -0,0 +1,83 @@
+import numpy as np
+
+__all__ = ["EpisodeBuffer", "BatchEpisodeBuffer"]
+
+
+class EpisodeBuffer:
+    # Trajectoire (s_t, a_t, r_{t+1}) stockée en tableaux préalloués, réutilisés d'un épisode à l'autre
+    def __init__(self, capacity=128):
+        self.states = np.empty(capacity, dtype=np.int32)
+        self.actions = np.empty(capacity, dtype=np.int32)
+        self.rewards = np.empty(capacity, dtype=np.float32)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        self.size = 0
+
+    def append(self, s, a, r):
+        if self.size == len(self.states):
+            self._grow()
+        i = self.size
+        self.states[i] = s
+        self.actions[i] = a
+        self.rewards[i] = r
+        self.size = i + 1
+
+    def _grow(self):
+        # Capacité doublée ; le contenu courant est conservé
+        capacity = 2 * max(len(self.states), 1)
+        for name in ("states", "actions", "rewards"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def views(self):
+        # Vues sans copie sur l'épisode courant : invalides après clear() ou un agrandissement
+        return self.states[:self.size], self.actions[:self.size], self.rewards[:self.size]
+
+
+class BatchEpisodeBuffer:
+    # N trajectoires en parallèle (une ligne par emplacement d'environnement vectorisé).
+    # with_probs : colonne probs en plus, probabilité de chaque action sous la politique qui l'a tirée
+    def __init__(self, num_envs, capacity=128, with_probs=False):
+        self.states = np.empty((num_envs, capacity), dtype=np.int32)
+        self.actions = np.empty((num_envs, capacity), dtype=np.int32)
+        self.rewards = np.empty((num_envs, capacity), dtype=np.float32)
+        self.probs = np.empty((num_envs, capacity), dtype=np.float64) if with_probs else None
+        self.lengths = np.zeros(num_envs, dtype=np.int64)
+
+    def clear(self, slots):
+        self.lengths[slots] = 0
+
+    def append(self, slots, s, a, r, p=None):
+        # Un pas pour chacun des emplacements slots (tableaux alignés) ; p : probabilités des actions (with_probs)
+        t = self.lengths[slots]
+        if t.size and t.max() >= self.states.shape[1]:
+            self._grow()
+        self.states[slots, t] = s
+        self.actions[slots, t] = a
+        self.rewards[slots, t] = r
+        if self.probs is not None:
+            self.probs[slots, t] = p
+        self.lengths[slots] = t + 1
+
+    def _grow(self):
+        capacity = 2 * self.states.shape[1]
+        for name in ("states", "actions", "rewards", "probs"):
+            old = getattr(self, name)
+            if old is None:
+                continue
+            new = np.empty((old.shape[0], capacity), dtype=old.dtype)
+            new[:, :old.shape[1]] = old
+            setattr(self, name, new)
+
+    def views(self, slot):
+        n = self.lengths[slot]
+        return self.states[slot, :n], self.actions[slot, :n], self.rewards[slot, :n]
+
+    def probs_view(self, slot):
+        return self.probs[slot, :self.lengths[slot]]
@@ -0,0 +1,37 @@
+import numpy as np
+
+__all__ = ["EpisodeStats"]
+
+
+class EpisodeStats(list):
+    # Longueurs des épisodes (la liste steps_per_episode renvoyée par les agents MC) et compteurs :
+    # truncated : épisodes arrêtés par max_steps ; cycles : épisodes où un couple (s, a) choisi de façon
+    # déterministe est revenu ; cut_cycles : épisodes interrompus dès ce retour (stop_cycles=True)
+    def __init__(self, steps=()):
+        super().__init__(steps)
+        self.truncated = 0
+        self.cycles = 0
+        self.cut_cycles = 0
+
+    def record(self, steps, truncated=False, cycle=False, cut=False):
+        self.append(steps)
+        self.truncated += bool(truncated)
+        self.cycles += bool(cycle)
+        self.cut_cycles += bool(cut)
+
+    def merge(self, other):
+        # Fusion des statistiques d'un processus (ou d'une simple liste de longueurs)
+        self.extend(other)
+        if isinstance(other, EpisodeStats):
+            self.truncated += other.truncated
+            self.cycles += other.cycles
+            self.cut_cycles += other.cut_cycles
+
+    def summary(self):
+        return {
+            "episodes": len(self),
+            "mean_steps": float(np.mean(self)) if self else 0.0,
+            "truncated": self.truncated,
+            "cycles": self.cycles,
+            "cut_cycles": self.cut_cycles,
+        }
@@ -0,0 +1,155 @@
+import numpy as np
+
+from agents.mc_returns import discounted_returns
+from agents.policies import GreedyPolicy, TabularPolicy
+
+__all__ = [
+    "ESTIMATORS",
+    "behavior_policy",
+    "off_policy_update",
+    "refresh_estimates",
+    "ordinary_importance_sampling",
+    "weighted_importance_sampling",
+    "per_decision_importance_sampling",
+    "discounting_aware_importance_sampling",
+    "weighted_discounting_aware_importance_sampling",
+]
+
+# Chaque estimateur reçoit les récompenses r_{t+1} d'un épisode et les rapports pi(a_t|s_t) / b(a_t|s_t),
+# et renvoie par pas t un numérateur et un dénominateur à cumuler sur (s_t, a_t) : Q = somme num / somme den.
+# Pour une valeur d'action, le rapport du pas t lui-même n'intervient pas (a_t est donnée).
+
+
+def behavior_policy(behavior, target):
+    # None : uniforme ; nombre epsilon : ε-greedy autour de la cible (vecteur glouton partagé, suit ses mises
+    # à jour) ; sinon matrice (S, A) de probabilités fixe
+    num_states, num_actions = target.shape
+    if behavior is None:
+        return GreedyPolicy(num_states, num_actions, epsilon=1.0)
+    if np.isscalar(behavior):
+        if not 0.0 < behavior <= 1.0:
+            raise ValueError("L'epsilon de la politique de comportement doit être dans ]0, 1]")
+        return GreedyPolicy(num_states, num_actions, epsilon=behavior, greedy=target.greedy)
+    return TabularPolicy(behavior)
+
+
+def _trailing_weights(ratios):
+    # W_t = produit des rapports des pas t+1 .. T-1, par produit cumulé inverse
+    weights = np.ones(len(ratios))
+    weights[:-1] = np.cumprod(ratios[:0:-1])[::-1]
+    return weights
+
+
+def _ratio_suffix_sums(values, ratios, gamma):
+    # S_t = values_t + gamma * rapport_{t+1} * S_{t+1} (S_T = 0) : somme des values_k pondérées par gamma^(k-t) et
+    # les rapports des pas t+1 .. k ; un rapport nul coupe la somme. Récurrence composée par doublement
+    # (S_t = B_t + A_t S_{t+k}, k = 1, 2, 4, ...) : log2(T) passes vectorisées, sans division ni produit sur
+    # tout l'épisode ramené à une échelle commune (0 / 0 sur les longs épisodes). Un A_t qui sous-déborde vaut 0 :
+    # les termes qu'il porte sont négligeables.
+    B = np.array(values, dtype=np.float64)
+    n = len(B)
+    A = np.zeros(n)
+    A[:-1] = gamma * np.asarray(ratios[1:], dtype=np.float64)
+    k = 1
+    while k < n:
+        B[:-k] += A[:-k] * B[k:]
+        A[:-k] *= A[k:]
+        k *= 2
+    return B
+
+
+def ordinary_importance_sampling(rewards, ratios, gamma):
+    weights = _trailing_weights(ratios)
+    return weights * discounted_returns(rewards, gamma), np.ones(len(rewards))
+
+
+def weighted_importance_sampling(rewards, ratios, gamma):
+    weights = _trailing_weights(ratios)
+    return weights * discounted_returns(rewards, gamma), weights
+
+
+def per_decision_importance_sampling(rewards, ratios, gamma):
+    # Chaque récompense r_{k+1} n'est pondérée que par les rapports des pas t+1 .. k
+    return _ratio_suffix_sums(rewards, ratios, gamma), np.ones(len(rewards))
+
+
+def _discounting_aware_terms(rewards, ratios, gamma):
+    # Retours plats partiels tronqués à chaque horizon, pondérés (1 - gamma) gamma^(h-t-1) et gamma^(T-t-1)
+    # pour le dernier : numérateur et poids total par pas. Poids total W_t = w_t + gamma rapport_{t+1} W_{t+1} ;
+    # le retour plat de t jusqu'à l'horizon vaut r_{t+1} plus celui de t+1, d'où N_t = r_{t+1} W_t + gamma
+    # rapport_{t+1} N_{t+1}
+    rewards = np.asarray(rewards, dtype=np.float64)
+    horizon_weights = np.full(len(rewards), 1.0 - gamma)
+    horizon_weights[-1] = 1.0
+    total = _ratio_suffix_sums(horizon_weights, ratios, gamma)
+    return _ratio_suffix_sums(rewards * total, ratios, gamma), total
+
+
+def discounting_aware_importance_sampling(rewards, ratios, gamma):
+    numerators, _ = _discounting_aware_terms(rewards, ratios, gamma)
+    return numerators, np.ones(len(numerators))
+
+
+def weighted_discounting_aware_importance_sampling(rewards, ratios, gamma):
+    return _discounting_aware_terms(rewards, ratios, gamma)
+
+
+ESTIMATORS = {
+    "ordinary": ordinary_importance_sampling,
+    "weighted": weighted_importance_sampling,
+    "per_decision": per_decision_importance_sampling,
+    "discounting_aware": discounting_aware_importance_sampling,
+    "weighted_discounting_aware": weighted_discounting_aware_importance_sampling,
+}
+
+
+def refresh_estimates(Q, numerators, denominators, target, states, actions):
+    # Q = somme des numérateurs / somme des dénominateurs là où l'estimateur a reçu un poids non nul,
+    # puis politique cible gloutonne sur les états touchés
+    den = denominators[states, actions]
+    seen = den > 0
+    Q[states[seen], actions[seen]] = numerators[states[seen], actions[seen]] / den[seen]
+    target.update(np.unique(states), Q)
+
+
+def _weighted_backward_update(Q, numerators, denominators, target, states, actions, rewards, behavior_probs, gamma):
+    # Boucle à rebours de l'échantillonnage préférentiel pondéré : mise à jour incrémentale de Q, politique
+    # cible rendue gloutonne dans l'état après chaque pas, arrêt à la première action non gloutonne ;
+    # W porte d'un pas à l'autre le produit des 1 / b(a|s) déjà parcourus
+    G = discounted_returns(rewards, gamma)
+    W = 1.0
+    for t in range(len(states) - 1, -1, -1):
+        s, a = states[t], actions[t]
+        numerators[s, a] += W * G[t]
+        denominators[s, a] += W
+        Q[s, a] += (W / denominators[s, a]) * (G[t] - Q[s, a])
+        target.update(s, Q)
+        if a != target.greedy[s]:
+            break
+        W *= 1.0 / behavior_probs[t]
+
+
+def off_policy_update(Q, numerators, denominators, target, states, actions, rewards, behavior_probs, gamma,
+                      estimator="weighted"):
+    # weighted : boucle à rebours pas à pas (amélioration de la cible après chaque pas).
+    # Autres estimateurs : parcours à rebours par tronçons, poids en produits cumulés vectorisés sous la politique
+    # cible courante, appliqués jusqu'à la dernière action non gloutonne ; si la mise à jour la rend gloutonne, le
+    # tronçon précédent est pondéré sous la politique améliorée (approximation de la boucle pas à pas).
+    if estimator == "weighted":
+        _weighted_backward_update(Q, numerators, denominators, target, states, actions, rewards, behavior_probs,
+                                  gamma)
+        return
+    end = len(states)
+    while end > 0:
+        target_probs = target[states, actions]
+        num, den = ESTIMATORS[estimator](rewards, target_probs / behavior_probs, gamma)
+        if end < len(states) and target_probs[end] == 0.0:
+            start = 0
+        else:
+            cuts = np.flatnonzero(target_probs[1:end] == 0.0)
+            start = cuts[-1] + 1 if len(cuts) else 0
+        segment = states[start:end], actions[start:end]
+        np.add.at(numerators, segment, num[start:end])
+        np.add.at(denominators, segment, den[start:end])
+        refresh_estimates(Q, numerators, denominators, target, *segment)
+        end = start
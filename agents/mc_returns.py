@@ -0,0 +1,47 @@
+import numpy as np
+
+try:
+    from scipy.signal import lfilter
+except ImportError:  # scipy est optionnel : repli sur un calcul par blocs en NumPy
+    lfilter = None
+
+__all__ = ["discounted_returns", "first_visit_indices", "incremental_mean_update"]
+
+# En repli NumPy, gamma^k doit rester >= cette valeur à l'intérieur d'un bloc (précision du rapport)
+_BLOCK_MIN_DISCOUNT = 1e-4
+
+
+def discounted_returns(rewards, gamma):
+    # G_t = r_{t+1} + gamma * G_{t+1} pour tout t, en une passe vectorisée
+    rewards = np.asarray(rewards, dtype=np.float64)
+    if rewards.size == 0 or gamma == 0.0:
+        return rewards.copy()
+    if lfilter is not None:
+        # Même récurrence que la boucle Python, évaluée en C
+        return lfilter([1.0], [1.0, -gamma], rewards[::-1])[::-1]
+
+    # Blocs de longueur B avec gamma^B >= _BLOCK_MIN_DISCOUNT : somme cumulée inverse de r_k gamma^k / gamma^t
+    block = len(rewards) if gamma >= 1.0 else max(1, int(np.log(_BLOCK_MIN_DISCOUNT) / np.log(gamma)))
+    powers = gamma ** np.arange(min(block, len(rewards)))
+    returns = np.empty_like(rewards)
+    carry = 0.0
+    for end in range(len(rewards), 0, -block):
+        start = max(0, end - block)
+        p = powers[:end - start]
+        scaled = np.cumsum((rewards[start:end] * p)[::-1])[::-1] / p
+        returns[start:end] = scaled + carry * gamma * p[-1] / p
+        carry = returns[start]
+    return returns
+
+
+def first_visit_indices(states, actions, num_actions):
+    # Indices t de la première occurrence de chaque couple (s_t, a_t) dans l'épisode
+    keys = np.asarray(states, dtype=np.int64) * num_actions + np.asarray(actions, dtype=np.int64)
+    _, first = np.unique(keys, return_index=True)
+    return first
+
+
+def incremental_mean_update(Q, counts, states, actions, returns):
+    # Moyenne incrémentale Q += (G - Q) / N par np.add.at ; exacte même si un couple se répète
+    np.add.at(counts, (states, actions), 1)
+    np.add.at(Q, (states, actions), (returns - Q[states, actions]) / counts[states, actions])
@@ -0,0 +1,334 @@
+import numpy as np
+
+__all__ = ["CSRMatrix", "DenseMDP", "SparseMDP", "build_model", "compile_model", "as_model"]
+
+# Au-delà de ce nombre de cases S*A*S, le tenseur dense devient trop coûteux en mémoire
+DENSE_MAX_ENTRIES = 5_000_000
+
+
+def _enumerate_env(env):
+    # Parcourt l'environnement une seule fois : états, actions et transitions indexés
+    states = list(env.get_states())
+    state_to_index = {s: i for i, s in enumerate(states)}
+    actions, action_to_index = [], {}
+    rows_s, rows_a, probs, next_states, rewards = [], [], [], [], []
+    valid = []  # (s, a) valides
+    terminal = []
+
+    i = 0
+    while i < len(states):
+        s = states[i]
+        env_actions = [] if env.is_terminal(s) else list(env.get_actions(s))
+        terminal.append(len(env_actions) == 0)
+        for a in env_actions:
+            if a not in action_to_index:
+                action_to_index[a] = len(actions)
+                actions.append(a)
+            a_idx = action_to_index[a]
+            valid.append((i, a_idx))
+            for prob, s_prime, reward in env.get_transitions(s, a):
+                if s_prime not in state_to_index:
+                    # Successeur absent de get_states() : on l'ajoute au modèle
+                    state_to_index[s_prime] = len(states)
+                    states.append(s_prime)
+                rows_s.append(i)
+                rows_a.append(a_idx)
+                probs.append(prob)
+                next_states.append(state_to_index[s_prime])
+                rewards.append(reward)
+        i += 1
+
+    transitions = (
+        np.array(rows_s, dtype=np.int64),
+        np.array(rows_a, dtype=np.int64),
+        np.array(probs, dtype=np.float64),
+        np.array(next_states, dtype=np.int64),
+        np.array(rewards, dtype=np.float64),
+    )
+    return states, actions, transitions, valid, np.array(terminal, dtype=bool)
+
+
+class CSRMatrix:
+    # Matrice creuse au format CSR minimal : produit matrice-vecteur en O(nnz)
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = shape
+        self.row_ids = np.repeat(np.arange(shape[0]), np.diff(indptr))
+
+    @property
+    def nnz(self):
+        return self.data.size
+
+    def __matmul__(self, x):
+        if x.ndim == 1:
+            return np.bincount(self.row_ids, weights=self.data * x[self.indices], minlength=self.shape[0])
+        # x de forme (n, G) : une colonne par problème (ex. plusieurs gamma)
+        out = np.zeros((self.shape[0],) + x.shape[1:])
+        non_empty = np.diff(self.indptr) > 0
+        if self.nnz:
+            weighted = self.data[:, None] * x[self.indices]
+            out[non_empty] = np.add.reduceat(weighted, self.indptr[:-1][non_empty], axis=0)
+        return out
+
+    def to_scipy(self):
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+    def row_dot(self, i, x):
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.data[start:end] @ x[self.indices[start:end]]
+
+    def select_rows(self, rows):
+        counts = np.diff(self.indptr)[rows]
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        offsets = np.repeat(self.indptr[rows] - indptr[:-1], counts)
+        positions = offsets + np.arange(indptr[-1])
+        return CSRMatrix(indptr, self.indices[positions], self.data[positions], (len(rows), self.shape[1]))
+
+
+class _TabularMDP:
+    def __init__(self, states, actions, R, mask, terminal):
+        self.states = states
+        self.state_to_index = {s: i for i, s in enumerate(states)}
+        self.actions = actions
+        self.action_to_index = {a: i for i, a in enumerate(actions)}
+        self.R = R  # (S, A) récompense espérée
+        self.mask = mask  # (S, A) actions valides
+        self.terminal = terminal  # (S,) états sans action (valeur nulle)
+        self.num_states, self.num_actions = R.shape
+        self._levels = None
+
+    def expected_next_values(self, V):
+        # V de forme (S,) ou (S, G) ; résultat (S, A) ou (S, A, G)
+        raise NotImplementedError
+
+    def q_values(self, V, gamma):
+        Q = self.R + gamma * self.expected_next_values(V)
+        return np.where(self.mask, Q, -np.inf)
+
+    def transition_triples(self):
+        # Transitions non nulles sous forme (s, a, s', prob)
+        raise NotImplementedError
+
+    def predecessors(self):
+        # Index inverse en CSR sur s' : prédécesseurs p et poids max_a P(p, a, s')
+        s, _, s_prime, prob = self.transition_triples()
+        order = np.lexsort((s, s_prime))
+        s, s_prime, prob = s[order], s_prime[order], prob[order]
+        if s.size:
+            starts = np.flatnonzero(np.r_[True, (s[1:] != s[:-1]) | (s_prime[1:] != s_prime[:-1])])
+            s, s_prime, prob = s[starts], s_prime[starts], np.maximum.reduceat(prob, starts)
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(s_prime, minlength=self.num_states))))
+        return indptr, s, prob
+
+    def topological_levels(self):
+        # Ordre topologique inverse par niveaux (successeurs d'abord) ; None si le graphe contient un cycle
+        if self._levels is None:
+            pred_indptr, pred_states, _ = self.predecessors()
+            out_degree = np.bincount(pred_states, minlength=self.num_states)
+            frontier = np.flatnonzero(out_degree == 0)
+            levels, visited = [], 0
+            while frontier.size:
+                levels.append(frontier)
+                visited += frontier.size
+                counts = pred_indptr[frontier + 1] - pred_indptr[frontier]
+                positions = np.repeat(pred_indptr[frontier] - np.cumsum(np.r_[0, counts[:-1]]), counts) \
+                    + np.arange(counts.sum())
+                preds = pred_states[positions]
+                np.subtract.at(out_degree, preds, 1)
+                frontier = np.unique(preds[out_degree[preds] == 0])
+            self._levels = levels if visited == self.num_states else False
+        return self._levels or None
+
+    def is_acyclic(self):
+        return self.topological_levels() is not None
+
+    def reverse_bfs_order(self):
+        # États triés par distance (en transitions) aux états terminaux ; les inatteignables à la fin
+        pred_indptr, pred_states, _ = self.predecessors()
+        distance = np.full(self.num_states, -1)
+        frontier = np.flatnonzero(self.terminal)
+        distance[frontier] = 0
+        depth = 0
+        while frontier.size:
+            depth += 1
+            counts = pred_indptr[frontier + 1] - pred_indptr[frontier]
+            positions = np.repeat(pred_indptr[frontier] - np.cumsum(np.r_[0, counts[:-1]]), counts) \
+                + np.arange(counts.sum())
+            preds = np.unique(pred_states[positions])
+            frontier = preds[distance[preds] < 0]
+            distance[frontier] = depth
+        distance[distance < 0] = depth + 1
+        return np.argsort(distance, kind="stable")
+
+    def state_q_values(self, s, V, gamma):
+        raise NotImplementedError
+
+    def states_q_values(self, states, V, gamma):
+        # Q-valeurs (k, A) d'un sous-ensemble d'états
+        raise NotImplementedError
+
+    def transition_rows(self, rows):
+        raise NotImplementedError
+
+    def first_valid_actions(self):
+        return np.where(self.terminal, -1, np.argmax(self.mask, axis=1))
+
+    def greedy_actions(self, V, gamma):
+        Q = self.q_values(V, gamma)
+        return np.where(self.terminal, -1, np.argmax(Q, axis=1)), Q
+
+    def policy_rewards(self, policy):
+        R_pi = self.R[np.arange(self.num_states), np.where(self.terminal, 0, policy)]
+        R_pi[self.terminal] = 0.0
+        return R_pi
+
+    def policy_to_dict(self, policy, include_terminal=False):
+        result = {}
+        for i, s in enumerate(self.states):
+            if self.terminal[i]:
+                if include_terminal:
+                    result[s] = None
+                continue
+            result[s] = self.actions[policy[i]]
+        return result
+
+    def values_to_dict(self, V):
+        return {s: float(V[i]) for i, s in enumerate(self.states)}
+
+    def values_from(self, V):
+        # Accepte un dict {état: valeur} (format renvoyé par les solveurs) ou un tableau indexé
+        if isinstance(V, dict):
+            values = np.zeros(self.num_states)
+            for s, v in V.items():
+                if s in self.state_to_index:
+                    values[self.state_to_index[s]] = v
+        else:
+            values = np.array(V, dtype=float)
+        values[self.terminal] = 0.0
+        return values
+
+    def policy_from(self, policy):
+        # Accepte un dict {état: action} ou un tableau d'indices ; actions absentes ou invalides -> 1re valide
+        result = self.first_valid_actions()
+        if isinstance(policy, dict):
+            for s, a in policy.items():
+                if s in self.state_to_index and a in self.action_to_index:
+                    i, a_idx = self.state_to_index[s], self.action_to_index[a]
+                    if self.mask[i, a_idx]:
+                        result[i] = a_idx
+        else:
+            policy = np.asarray(policy)
+            valid = ~self.terminal & (policy >= 0)
+            valid[valid] = self.mask[np.flatnonzero(valid), policy[valid]]
+            result[valid] = policy[valid]
+        return result
+
+
+class DenseMDP(_TabularMDP):
+    def __init__(self, states, actions, P, R, mask, terminal):
+        super().__init__(states, actions, R, mask, terminal)
+        self.P = P  # (S, A, S) probabilités de transition
+
+    def expected_next_values(self, V):
+        # sum_s' P[s, a, s'] * V[s'] pour tous les couples (s, a)
+        return self.P @ V
+
+    def transition_triples(self):
+        s, a, s_prime = np.nonzero(self.P)
+        return s, a, s_prime, self.P[s, a, s_prime]
+
+    def state_q_values(self, s, V, gamma):
+        return np.where(self.mask[s], self.R[s] + gamma * (self.P[s] @ V), -np.inf)
+
+    def states_q_values(self, states, V, gamma):
+        return np.where(self.mask[states], self.R[states] + gamma * (self.P[states] @ V), -np.inf)
+
+    def transition_rows(self, rows):
+        # Sous-matrice (k, S) des couples s * A + a retenus
+        return self.P.reshape(-1, self.num_states)[rows]
+
+    def policy_model(self, policy):
+        # Restriction du modèle à la politique : P_pi (S, S) et R_pi (S,), nuls sur les états terminaux
+        P_pi = self.P[np.arange(self.num_states), np.where(self.terminal, 0, policy)]
+        P_pi[self.terminal] = 0.0
+        return P_pi, self.policy_rewards(policy)
+
+
+class SparseMDP(_TabularMDP):
+    def __init__(self, states, actions, P, R, mask, terminal):
+        super().__init__(states, actions, R, mask, terminal)
+        self.P = P  # CSRMatrix (S*A, S), ligne s * A + a
+
+    def expected_next_values(self, V):
+        return (self.P @ V).reshape((self.num_states, self.num_actions) + V.shape[1:])
+
+    def transition_triples(self):
+        rows = self.P.row_ids
+        return rows // self.num_actions, rows % self.num_actions, self.P.indices, self.P.data
+
+    def state_q_values(self, s, V, gamma):
+        start, end = self.P.indptr[s * self.num_actions], self.P.indptr[(s + 1) * self.num_actions]
+        expected = np.bincount(self.P.row_ids[start:end] - s * self.num_actions,
+                               weights=self.P.data[start:end] * V[self.P.indices[start:end]],
+                               minlength=self.num_actions)
+        return np.where(self.mask[s], self.R[s] + gamma * expected, -np.inf)
+
+    def states_q_values(self, states, V, gamma):
+        rows = (states[:, None] * self.num_actions + np.arange(self.num_actions)).ravel()
+        expected = (self.P.select_rows(rows) @ V).reshape(len(states), self.num_actions)
+        return np.where(self.mask[states], self.R[states] + gamma * expected, -np.inf)
+
+    def transition_rows(self, rows):
+        return self.P.select_rows(rows)
+
+    def policy_model(self, policy):
+        # Les états terminaux n'ont aucune transition : leurs lignes sont vides
+        rows = np.arange(self.num_states) * self.num_actions + np.where(self.terminal, 0, policy)
+        return self.P.select_rows(rows), self.policy_rewards(policy)
+
+
+def build_model(states, actions, transitions, mask, terminal, sparse=None):
+    # Construit le modèle à partir des transitions (s, a, prob, s', r) en indices
+    rows_s, rows_a, probs, next_states, rewards = transitions
+    num_states, num_actions = len(states), max(len(actions), 1)
+    if sparse is None:
+        sparse = num_states * num_actions * num_states > DENSE_MAX_ENTRIES
+
+    R = np.zeros((num_states, num_actions))
+    np.add.at(R, (rows_s, rows_a), probs * rewards)
+
+    if sparse:
+        rows = rows_s * num_actions + rows_a
+        order = np.argsort(rows, kind="stable")
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=num_states * num_actions))))
+        P = CSRMatrix(indptr, next_states[order], probs[order], (num_states * num_actions, num_states))
+        return SparseMDP(states, actions, P, R, mask, terminal)
+
+    P = np.zeros((num_states, num_actions, num_states))
+    np.add.at(P, (rows_s, rows_a, next_states), probs)
+    return DenseMDP(states, actions, P, R, mask, terminal)
+
+
+def compile_model(env, sparse=None):
+    states, actions, transitions, valid, terminal = _enumerate_env(env)
+    mask = np.zeros((len(states), max(len(actions), 1)), dtype=bool)
+    if valid:
+        valid = np.array(valid)
+        mask[valid[:, 0], valid[:, 1]] = True
+    return build_model(states, actions, transitions, mask, terminal, sparse)
+
+
+# Backends acceptés par as_model -> paramètre sparse de compile_model
+_MODEL_BACKENDS = {"auto": None, "dense": False, "sparse": True}
+
+
+def as_model(env, backend="auto"):
+    # Permet de passer indifféremment un environnement ou un modèle déjà compilé
+    if isinstance(env, _TabularMDP):
+        return env
+    if backend not in _MODEL_BACKENDS:
+        raise ValueError(f"Backend non pris en charge : {backend} (attendu : {', '.join(_MODEL_BACKENDS)})")
+    return compile_model(env, sparse=_MODEL_BACKENDS[backend])
@@ -1,6 +1,16 @@
 import numpy as np
 from tqdm import tqdm
 
+from agents.episode_buffer import BatchEpisodeBuffer, EpisodeBuffer
+from agents.episode_stats import EpisodeStats
+from agents.importance_sampling import ESTIMATORS, behavior_policy, off_policy_update, refresh_estimates
+from agents.mc_returns import discounted_returns, first_visit_indices, incremental_mean_update
+from agents.parallel_mc import run_parallel_rounds
+from agents.policies import CumulativeSampler, GreedyPolicy
+from agents.random_stream import RandomStream
+from environments.step_protocol import as_step_env
+from environments.vector_env import make_vector_env
+
 __all__ = [
     "on_policy_first_visit_mc_control",
     "monte_carlo_es",
@@ -17,190 +27,366 @@ def get_num_actions(env):
 
 
 def greedy_policy_from_q(Q):
-    num_states, num_actions = Q.shape
-    pi = np.zeros((num_states, num_actions))
-    for s in range(num_states):
-        best_a = np.argmax(Q[s])
-        pi[s, best_a] = 1.0
-    return pi
-
-
-def on_policy_first_visit_mc_control(env, episodes=10000, gamma=0.99, epsilon=0.1):
+    return GreedyPolicy.from_q(Q)
+
+
+# Génération d'un épisode dans episode (EpisodeBuffer), consigné dans stats (EpisodeStats) ; renvoie l'état final.
+# Un cycle est le retour d'un couple (s, a) choisi de façon déterministe dans le même épisode ; avec
+# stop_cycles=True, l'épisode s'arrête à ce retour au lieu de tourner jusqu'à max_steps.
+# rng : RandomStream de l'agent (tous les tirages de la génération d'épisodes) ; env suit le protocole de pas
+# de environments.step_protocol (as_step_env).
+def _rollout_on_policy(env, episode, stats, rng, sampler):
+    env.reset()
+    episode.clear()
+
+    s = env.get_state()
+    done = env.is_game_over()
+    while not done:
+        a = sampler.sample(s, rng)
+        s_prime, r, done = env.step_transition(a)
+        episode.append(s, a, r)
+        s = s_prime
+
+    stats.record(len(episode))
+    return s
+
+
+def _rollout_exploring_starts(env, episode, stats, rng, pi, max_steps, stop_cycles=False):
+    num_states, num_actions = pi.shape
+    s0 = rng.integers(num_states)
+    a0 = rng.integers(num_actions)
+    env.reset_to(s0, a0)
+    episode.clear()
+
+    s = s0
+    a = a0
+    done = env.is_game_over()
+    greedy_pairs = set()
+    cycle = cut = False
+    while not done and len(episode) < max_steps:
+        s_prime, r, done = env.step_transition(a)
+        episode.append(s, a, r)
+
+        s = s_prime
+        if rng.random() < 0.05:
+            a = rng.integers(num_actions)
+        else:
+            a = pi.greedy[s]
+            key = s * num_actions + a
+            if key in greedy_pairs:
+                cycle = True
+                if stop_cycles:
+                    cut = True
+                    break
+            greedy_pairs.add(key)
+
+    stats.record(len(episode), not cut and not done, cycle, cut)
+    return s
+
+
+def _rollout_behavior(env, episode, stats, rng, behavior, max_steps, deterministic=None, stop_cycles=False):
+    # Politique de comportement de off_policy_mc_control (uniforme, ε-greedy autour de la cible ou tabulaire) ;
+    # deterministic (S,) : états où elle choisit une action avec probabilité 1 (détection de cycles)
+    env.reset()
+    episode.clear()
+    num_actions = behavior.shape[1]
+
+    s = env.get_state()
+    done = env.is_game_over()
+    visited = set()
+    cycle = cut = False
+    while not done and len(episode) < max_steps:
+        a = int(behavior.sample(s, rng))
+        if deterministic is not None and deterministic[s]:
+            key = s * num_actions + a
+            if key in visited:
+                cycle = True
+                if stop_cycles:
+                    cut = True
+                    break
+            visited.add(key)
+
+        s_prime, r, done = env.step_transition(a)
+        episode.append(s, a, r)
+        s = s_prime
+
+    stats.record(len(episode), not cut and not done, cycle, cut)
+    return s
+
+
+def _deterministic_states(behavior):
+    # None si la politique de comportement explore dans tous les états (pas de cycle possible à détecter)
+    deterministic = np.asarray(behavior).max(axis=1) >= 1.0
+    return deterministic if deterministic.any() else None
+
+
+# Statistiques suffisantes calculées par les processus du mode parallèle (workers=) ; chaque processus tire
+# son propre RandomStream depuis le générateur global qu'il a reçu ensemencé
+def _first_visit_statistics(env, rollout, rollout_args, episodes, gamma, shape):
+    # Somme des retours et nombre de premières visites par (s, a), états finaux et statistiques d'épisodes
+    returns_sum, counts = np.zeros(shape), np.zeros(shape)
+    final_states, stats = [], EpisodeStats()
+    episode = EpisodeBuffer()
+    rng = RandomStream()
+    for _ in range(episodes):
+        final_states.append(rollout(env, episode, stats, rng, *rollout_args))
+        states, actions, rewards = episode.views()
+        if len(episode) == 0:
+            continue
+        G = discounted_returns(rewards, gamma)
+        first = first_visit_indices(states, actions, shape[1])
+        np.add.at(returns_sum, (states[first], actions[first]), G[first])
+        np.add.at(counts, (states[first], actions[first]), 1)
+    return returns_sum, counts, final_states, stats
+
+
+def _importance_statistics(env, episodes, gamma, target, behavior, estimator, max_steps, stop_cycles):
+    # Numérateurs et dénominateurs de l'estimateur cumulés par (s, a) sous la politique cible figée target
+    behavior = behavior_policy(behavior, target)
+    deterministic = _deterministic_states(behavior)
+    numerators, denominators = np.zeros(target.shape), np.zeros(target.shape)
+    stats = EpisodeStats()
+    episode = EpisodeBuffer()
+    rng = RandomStream()
+    for _ in range(episodes):
+        _rollout_behavior(env, episode, stats, rng, behavior, max_steps, deterministic, stop_cycles)
+        if len(episode) == 0:
+            continue
+        states, actions, rewards = episode.views()
+        ratios = target[states, actions] / behavior[states, actions]
+        num, den = ESTIMATORS[estimator](rewards, ratios, gamma)
+        np.add.at(numerators, (states, actions), num)
+        np.add.at(denominators, (states, actions), den)
+    return numerators, denominators, stats
+
+
+def _merge_mean(Q, counts, returns_sum, new_counts):
+    # Fusion de moyennes : identique à une suite de mises à jour incrémentales Q += (G - Q) / N
+    seen = new_counts > 0
+    counts += new_counts
+    Q[seen] += (returns_sum[seen] - new_counts[seen] * Q[seen]) / counts[seen]
+    return np.flatnonzero(seen.any(axis=1))
+
+
+def _run_batched_episodes(venv, episodes, select_actions, update, desc, max_steps=None, action_probs=None):
+    # Joue `episodes` épisodes sur num_envs emplacements à la fois ; chaque épisode terminé (ou tronqué à
+    # max_steps) est transmis à update(states, actions, rewards, final_state) puis l'emplacement repart.
+    # action_probs(states, actions) : probabilités relevées au tirage, passées en cinquième argument à update
+    # (la politique peut changer avant la fin de l'épisode, sous l'effet des autres emplacements)
+    num_envs = min(venv.num_envs, episodes)
+    buffer = BatchEpisodeBuffer(num_envs, with_probs=action_probs is not None)
+    slots = np.arange(num_envs)
+    states = venv.reset(slots)
+    started, stats = num_envs, EpisodeStats()
+
+    with tqdm(total=episodes, desc=desc) as progress:
+        while slots.size:
+            actions = select_actions(states)
+            probs = None if action_probs is None else action_probs(states, actions)
+            next_states, rewards, terminal = venv.step(slots, actions)
+            buffer.append(slots, states, actions, rewards, probs)
+            states = next_states
+            done = terminal
+            if max_steps is not None:
+                done = terminal | (buffer.lengths[slots] >= max_steps)
+
+            for i in np.flatnonzero(done):
+                slot = slots[i]
+                stats.record(int(buffer.lengths[slot]), not terminal[i])
+                if action_probs is None:
+                    update(*buffer.views(slot), states[i])
+                else:
+                    update(*buffer.views(slot), states[i], buffer.probs_view(slot))
+                progress.update()
+
+            # Relance des emplacements terminés tant qu'il reste des épisodes à jouer
+            finished = slots[done]
+            restart = finished[:max(0, episodes - started)]
+            started += len(restart)
+            buffer.clear(finished)
+            if restart.size:
+                states[np.flatnonzero(done)[:len(restart)]] = venv.reset(restart)
+            keep = ~done
+            keep[np.flatnonzero(done)[:len(restart)]] = True
+            slots, states = slots[keep], states[keep]
+
+    return stats
+
+
+def on_policy_first_visit_mc_control(env, episodes=10000, gamma=0.99, epsilon=0.1, num_envs=None,
+                                     workers=None, sync_every=100, seed=None):
+    # num_envs : nombre d'épisodes joués simultanément sur un environnement vectorisé, si env le permet
+    # workers : épisodes générés par plusieurs processus, politique redistribuée tous les sync_every épisodes
+    env = as_step_env(env)
     num_states = get_num_states(env)
     num_actions = get_num_actions(env)
+    rng = RandomStream(seed)
 
-    Q = np.random.random((num_states, num_actions))
+    Q = rng.random((num_states, num_actions))
     Returns_count = np.zeros((num_states, num_actions))
-    pi = np.ones((num_states, num_actions)) * (1.0 / num_actions)
-    all_actions = np.arange(num_actions)
-
-    steps_per_episode = []
+    pi = GreedyPolicy(num_states, num_actions, epsilon=1.0)  # uniforme tant que l'état n'a pas été mis à jour
+    sampler = CumulativeSampler(pi.to_dense())
 
-    for _ in tqdm(range(episodes), desc="MC Control ε-soft"):
-        env.reset()
-        states, actions, rewards = [], [], []
-        step_count = 0
+    def improve(updated):
+        pi.update(updated, Q, epsilon)
+        sampler.update(updated, pi[updated])
 
-        while not env.is_game_over():
-            s = env.get_state()
-            a = np.random.choice(all_actions, p=pi[s])
-            old_score = env.score()
-            env.step(a)
-            r = env.score() - old_score
-
-            states.append(s)
-            actions.append(a)
-            rewards.append(r)
-            step_count += 1
-
-        steps_per_episode.append(step_count)
-
-        terminal_state = env.get_state()
+    def update(states, actions, rewards, terminal_state):
         Q[terminal_state, :] = 0.0
+        if len(states) == 0:
+            return
+
+        # Retours de tout l'épisode, puis mise à jour des premières visites en une fois
+        G = discounted_returns(rewards, gamma)
+        first = first_visit_indices(states, actions, num_actions)
+        incremental_mean_update(Q, Returns_count, states[first], actions[first], G[first])
+        improve(np.unique(states[first]))
+
+    def merge(returns_sum, counts, final_states):
+        improve(_merge_mean(Q, Returns_count, returns_sum, counts))
+        Q[final_states, :] = 0.0
+
+    if workers and workers > 1:
+        steps_per_episode = run_parallel_rounds(
+            env, _first_visit_statistics,
+            lambda n: (_rollout_on_policy, (CumulativeSampler(pi.to_dense()),), n, gamma, Q.shape),
+            merge, episodes, workers, sync_every, "MC Control ε-soft (parallèle)", rng)
+        return pi, Q, steps_per_episode
 
-        G = 0
-        visited = set()
+    venv = make_vector_env(env, num_envs, rng) if num_envs else None
+    if venv is not None:
+        steps_per_episode = _run_batched_episodes(venv, episodes, lambda states: pi.sample(states, rng),
+                                                  update, "MC Control ε-soft (vectorisé)")
+        return pi, Q, steps_per_episode
 
-        for t in reversed(range(len(states))):
-            s_t, a_t, r_tp1 = states[t], actions[t], rewards[t]
-            G = gamma * G + r_tp1
+    steps_per_episode = EpisodeStats()
 
-            if (s_t, a_t) not in visited:
-                visited.add((s_t, a_t))
-                Returns_count[s_t, a_t] += 1
-                Q[s_t, a_t] += (G - Q[s_t, a_t]) / Returns_count[s_t, a_t]
+    episode = EpisodeBuffer()
 
-                best_a = np.argmax(Q[s_t])
-                pi[s_t] = epsilon / num_actions
-                pi[s_t, best_a] = 1.0 - epsilon + (epsilon / num_actions)
+    for _ in tqdm(range(episodes), desc="MC Control ε-soft"):
+        final_state = _rollout_on_policy(env, episode, steps_per_episode, rng, sampler)
+        update(*episode.views(), final_state)
 
     return pi, Q, steps_per_episode
 
 
-def monte_carlo_es(env, episodes=10000, gamma=0.99, max_steps=100):
+def monte_carlo_es(env, episodes=10000, gamma=0.99, max_steps=100, workers=None, sync_every=100,
+                   stop_cycles=False, seed=None):
+    # workers : épisodes générés par plusieurs processus, politique redistribuée tous les sync_every épisodes
+    # stop_cycles : arrêt d'un épisode dès qu'un couple (s, a) glouton revient, plutôt qu'à max_steps ;
+    # épisodes tronqués et cycles sont comptés dans les EpisodeStats renvoyées (troisième valeur)
+    env = as_step_env(env)
     num_states = get_num_states(env)
     num_actions = get_num_actions(env)
+    rng = RandomStream(seed)
 
     try:
-        Q = np.random.random((num_states, num_actions))
+        Q = rng.random((num_states, num_actions))
         Returns_sum = np.zeros((num_states, num_actions))
         Returns_count = np.zeros((num_states, num_actions))
-        pi = greedy_policy_from_q(Q)
-        pi = (1 - 0.01) * pi + 0.01 * (1.0 / num_actions)  # petit bruit initial
-
-        steps_per_episode = []
-
-        for _ in tqdm(range(episodes), desc="Monte Carlo Exploring Starts"):
-            s0 = np.random.randint(0, num_states)
-            a0 = np.random.randint(0, num_actions)
-            env.reset_to(s0, a0)
-
-            episode = []
-            visited_pairs = set()
-            old_score = env.score()
-
-            s = s0
-            a = a0
-            step_count = 0
-            while not env.is_game_over() and step_count < max_steps:
-                env.step(a)
-                r = env.score() - old_score
-                old_score = env.score()
-                episode.append((s, a, r))
-
-                s = env.get_state()
-                if np.random.rand() < 0.05:
-                    a = np.random.randint(num_actions)
-                else:
-                    a = np.argmax(pi[s])
+        pi = GreedyPolicy.from_q(Q, epsilon=0.01)  # petit bruit initial
 
-                step_count += 1
+        if workers and workers > 1:
+            def merge(returns_sum, counts, _):
+                updated = _merge_mean(Returns_sum, Returns_count, returns_sum, counts)
+                seen = counts > 0
+                Q[seen] = Returns_sum[seen]
+                pi.update(updated, Q, epsilon=0.0)
 
-            steps_per_episode.append(step_count)
+            steps_per_episode = run_parallel_rounds(
+                env, _first_visit_statistics,
+                lambda n: (_rollout_exploring_starts, (pi.copy(), max_steps, stop_cycles), n, gamma, Q.shape),
+                merge, episodes, workers, sync_every, "Monte Carlo Exploring Starts (parallèle)", rng)
+            return pi, Q, steps_per_episode
 
-            if step_count >= max_steps:
-                print("Avertissement : max_steps atteint dans monte_carlo_es")
+        steps_per_episode = EpisodeStats()
 
-            G = 0
-            for t in reversed(range(len(episode))):
-                s_t, a_t, r_tp1 = episode[t]
-                G = gamma * G + r_tp1
+        episode = EpisodeBuffer()
 
-                if (s_t, a_t) not in visited_pairs:
-                    visited_pairs.add((s_t, a_t))
-                    Returns_count[s_t][a_t] += 1
-                    Returns_sum[s_t][a_t] += (G - Returns_sum[s_t][a_t]) / Returns_count[s_t][a_t]
-                    Q[s_t][a_t] = Returns_sum[s_t][a_t]
-                    pi[s_t] = np.eye(num_actions)[np.argmax(Q[s_t])]
+        for _ in tqdm(range(episodes), desc="Monte Carlo Exploring Starts"):
+            _rollout_exploring_starts(env, episode, steps_per_episode, rng, pi, max_steps, stop_cycles)
+            if len(episode) == 0:
+                continue
+
+            ep_states, ep_actions, ep_rewards = episode.views()
+            G = discounted_returns(ep_rewards, gamma)
+            first = first_visit_indices(ep_states, ep_actions, num_actions)
+            s_v, a_v = ep_states[first], ep_actions[first]
+            incremental_mean_update(Returns_sum, Returns_count, s_v, a_v, G[first])
+            Q[s_v, a_v] = Returns_sum[s_v, a_v]
+            pi.update(np.unique(s_v), Q, epsilon=0.0)
 
         return pi, Q, steps_per_episode
 
     except MemoryError:
         print("MemoryError : trop d'états pour Monte Carlo ES.")
         fallback_q = Q if 'Q' in locals() else np.zeros((num_states, num_actions))
-        return np.zeros((num_states, num_actions)), fallback_q, []
-
-
-def off_policy_mc_control(env, gamma=0.99, episodes=10000, max_steps=100):
+        fallback_steps = steps_per_episode if 'steps_per_episode' in locals() else EpisodeStats()
+        return GreedyPolicy.from_q(fallback_q), fallback_q, fallback_steps
+
+
+def off_policy_mc_control(env, gamma=0.99, episodes=10000, max_steps=100, num_envs=None, workers=None,
+                          sync_every=100, estimator="weighted", behavior=None, stop_cycles=False, seed=None):
+    # estimator : clé de ESTIMATORS (ordinary, weighted, per_decision, discounting_aware, weighted_discounting_aware)
+    # behavior : None (uniforme), epsilon (ε-greedy autour de la politique cible) ou matrice (S, A) fixe
+    # stop_cycles : arrêt d'un épisode dès qu'un couple (s, a) choisi de façon déterministe revient ;
+    # épisodes tronqués et cycles sont comptés dans les EpisodeStats renvoyées (troisième valeur)
+    # num_envs : nombre d'épisodes joués simultanément sur un environnement vectorisé, si env le permet
+    # workers : épisodes générés par plusieurs processus, politique cible redistribuée tous les sync_every épisodes
+    env = as_step_env(env)
     try:
         num_states = get_num_states(env)
         num_actions = get_num_actions(env)
     except Exception:
         raise ValueError("L'environnement doit définir num_states() et num_actions()")
 
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Estimateur d'échantillonnage préférentiel inconnu : {estimator}")
+
+    rng = RandomStream(seed)
     Q = np.zeros((num_states, num_actions))
-    C = np.zeros((num_states, num_actions))
-    pi = np.zeros((num_states, num_actions))
+    numerators = np.zeros((num_states, num_actions))
+    denominators = np.zeros((num_states, num_actions))
+    pi = GreedyPolicy(num_states, num_actions, greedy=rng.integers(num_actions, size=num_states))
+    behavior_pi = behavior_policy(behavior, pi)
+
+    def update(ep_states, ep_actions, ep_rewards, _, ep_probs=None):
+        # ep_probs : b(a|s) relevés au tirage (mode vectorisé) ; sinon b ne change pas pendant l'épisode
+        if len(ep_states) == 0:
+            return
+        if ep_probs is None:
+            ep_probs = behavior_pi[ep_states, ep_actions]
+        off_policy_update(Q, numerators, denominators, pi, ep_states, ep_actions, ep_rewards, ep_probs, gamma,
+                          estimator)
+
+    def merge(new_numerators, new_denominators):
+        numerators[...] += new_numerators
+        denominators[...] += new_denominators
+        touched = np.nonzero((new_numerators != 0) | (new_denominators != 0))
+        refresh_estimates(Q, numerators, denominators, pi, *touched)
+
+    if workers and workers > 1:
+        steps_per_episode = run_parallel_rounds(
+            env, _importance_statistics,
+            lambda n: (n, gamma, pi.copy(), behavior, estimator, max_steps, stop_cycles),
+            merge, episodes, workers, sync_every, "Off-Policy MC Control (parallèle)", rng)
+        return pi, Q, steps_per_episode
 
-    for s in range(num_states):
-        pi[s, np.random.randint(num_actions)] = 1.0
+    venv = make_vector_env(env, num_envs, rng) if num_envs else None
+    if venv is not None:
+        steps_per_episode = _run_batched_episodes(venv, episodes, lambda states: behavior_pi.sample(states, rng),
+                                                  update, "Off-Policy MC Control (vectorisé)", max_steps,
+                                                  lambda states, actions: behavior_pi[states, actions])
+        return pi, Q, steps_per_episode
 
-    def behavior_policy(_):
-        return np.ones(num_actions) / num_actions
+    steps_per_episode = EpisodeStats()
+    deterministic = _deterministic_states(behavior_pi)
 
-    steps_per_episode = []
+    episode = EpisodeBuffer()
 
     for _ in tqdm(range(episodes), desc="Off-Policy MC Control"):
-        episode = []
-        env.reset()
-        old_score = env.score()
-
-        s = env.get_state()
-        done = False
-        step_count = 0
-
-        while not done and step_count < max_steps:
-            probs = behavior_policy(s)
-            a = np.random.choice(np.arange(num_actions), p=probs)
-
-            try:
-                env.step(a)
-            except TypeError:
-                env.step(s, a)
-
-            r = env.score() - old_score
-            old_score = env.score()
-            episode.append((s, a, r))
-
-            s = env.get_state()
-            done = env.is_game_over()
-            step_count += 1
-
-        steps_per_episode.append(step_count)
-
-        if step_count >= max_steps:
-            print("max_steps atteint - boucle potentielle")
-
-        G = 0
-        W = 1
-        for t in reversed(range(len(episode))):
-            s, a, r = episode[t]
-            G = gamma * G + r
-            C[s][a] += W
-            Q[s][a] += (W / C[s][a]) * (G - Q[s][a])
-            pi[s] = np.eye(num_actions)[np.argmax(Q[s])]
-            if pi[s][a] != 1.0:
-                break
-            W *= 1.0 / behavior_policy(s)[a]
+        s = _rollout_behavior(env, episode, steps_per_episode, rng, behavior_pi, max_steps, deterministic,
+                              stop_cycles)
+        update(*episode.views(), s)
 
     return pi, Q, steps_per_episode
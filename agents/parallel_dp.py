@@ -0,0 +1,150 @@
+import os
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from agents.mdp_model import SparseMDP
+
+__all__ = ["SharedMemoryExecutor"]
+
+# Tableaux du modèle et de l'état des balayages placés en mémoire partagée
+_SHARED_FIELDS = ("indptr", "indices", "data", "R", "mask", "terminal", "V", "policy")
+
+_worker_arrays = None
+_worker_blocks = None
+_worker_cache = {}
+
+
+def _csr_arrays(model):
+    # Transitions au format CSR sur les lignes s * A + a, quel que soit le backend du modèle
+    if isinstance(model, SparseMDP):
+        return model.P.indptr, model.P.indices, model.P.data
+    s, a, s_prime, prob = model.transition_triples()
+    rows = s * model.num_actions + a
+    order = np.argsort(rows, kind="stable")
+    counts = np.bincount(rows, minlength=model.num_states * model.num_actions)
+    return np.concatenate(([0], np.cumsum(counts))), s_prime[order], prob[order]
+
+
+def _attach(specs):
+    blocks, arrays = [], {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return blocks, arrays
+
+
+def _init_worker(specs, num_actions):
+    global _worker_arrays, _worker_blocks
+    _worker_blocks, _worker_arrays = _attach(specs)
+    _worker_arrays["num_actions"] = num_actions
+    _worker_cache.clear()
+
+
+def _partition_rows(lo, hi, policy_version=None):
+    # Positions CSR et indices de ligne locaux d'une partition (mis en cache par processus)
+    key = (lo, hi, policy_version)
+    if key not in _worker_cache:
+        arrays, num_actions = _worker_arrays, _worker_arrays["num_actions"]
+        indptr = arrays["indptr"]
+        if policy_version is None:
+            rows = np.arange(lo * num_actions, hi * num_actions)
+        else:
+            for stale in [k for k in _worker_cache if k[2] not in (None, policy_version)]:
+                del _worker_cache[stale]
+            rows = np.arange(lo, hi) * num_actions + np.where(arrays["terminal"][lo:hi], 0, arrays["policy"][lo:hi])
+        counts = indptr[rows + 1] - indptr[rows]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        positions = np.repeat(indptr[rows] - starts, counts) + np.arange(counts.sum())
+        local_rows = np.repeat(np.arange(len(rows)), counts)
+        _worker_cache[key] = (rows, positions, local_rows)
+    return _worker_cache[key]
+
+
+def _sweep_partition(task):
+    # Balayage de Jacobi sur les états [lo, hi) : lit V[src], écrit V[1 - src] ; renvoie les résidus
+    lo, hi, src, gamma, theta, policy_version = task
+    arrays = _worker_arrays
+    V_old, V_new = arrays["V"][src], arrays["V"][1 - src]
+    rows, positions, local_rows = _partition_rows(lo, hi, policy_version)
+    expected = np.bincount(local_rows, weights=arrays["data"][positions] * V_old[arrays["indices"][positions]],
+                           minlength=len(rows))
+    values = arrays["R"][rows] + gamma * expected
+    if policy_version is None:
+        values = np.where(arrays["mask"][rows], values, -np.inf).reshape(hi - lo, -1).max(axis=1)
+    values = np.where(arrays["terminal"][lo:hi], 0.0, values)
+    V_new[lo:hi] = values
+    diff = values - V_old[lo:hi]
+    return diff.min(), diff.max(), int(np.count_nonzero(np.abs(diff) >= theta))
+
+
+class _SharedSweeps:
+    # Pool de processus attaché à un modèle : V double tampon en mémoire partagée, une tâche par partition
+    def __init__(self, model, workers, partitions):
+        indptr, indices, data = _csr_arrays(model)
+        source = {
+            "indptr": indptr, "indices": indices, "data": data, "R": model.R.ravel(),
+            "mask": model.mask.ravel(), "terminal": model.terminal,
+            "V": np.zeros((2, model.num_states)), "policy": np.zeros(model.num_states, dtype=np.int64),
+        }
+        self._blocks, specs, self.arrays = [], {}, {}
+        for name in _SHARED_FIELDS:
+            array = np.ascontiguousarray(source[name])
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            self._blocks.append(block)
+            self.arrays[name] = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            self.arrays[name][...] = array
+            specs[name] = (block.name, array.shape, array.dtype.str)
+
+        # Partitions contiguës équilibrées en nombre de transitions
+        state_nnz = indptr[::model.num_actions]
+        targets = np.linspace(0, state_nnz[-1], partitions + 1)[1:-1]
+        cuts = np.unique(np.concatenate(([0], np.searchsorted(state_nnz, targets), [model.num_states])))
+        self.partitions = list(zip(cuts[:-1], cuts[1:]))
+        self.src = 0
+        self.policy_version = 0
+        self._pool = Pool(processes=workers, initializer=_init_worker, initargs=(specs, model.num_actions))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+    def values(self):
+        return self.arrays["V"][self.src].copy()
+
+    def load_values(self, V):
+        self.arrays["V"][self.src] = V
+
+    def load_policy(self, policy):
+        self.arrays["policy"][...] = policy
+        self.policy_version += 1
+
+    def sweep(self, gamma, theta, evaluation=False):
+        # Seule la réduction des résidus transite par le pool
+        version = self.policy_version if evaluation else None
+        tasks = [(lo, hi, self.src, gamma, theta, version) for lo, hi in self.partitions]
+        results = self._pool.map(_sweep_partition, tasks)
+        self.src = 1 - self.src
+        low = min(r[0] for r in results)
+        up = max(r[1] for r in results)
+        return max(-low, up), low, up, sum(r[2] for r in results)
+
+
+class SharedMemoryExecutor:
+    # Exécuteur des balayages de Jacobi sur plusieurs processus, passé via executor= aux solveurs DP
+    def __init__(self, workers=None, partitions_per_worker=4):
+        self.workers = workers or os.cpu_count() or 1
+        self.partitions_per_worker = partitions_per_worker
+
+    def attach(self, model):
+        return _SharedSweeps(model, self.workers, self.workers * self.partitions_per_worker)
@@ -0,0 +1,61 @@
+from multiprocessing import Pool
+
+import numpy as np
+from tqdm import tqdm
+
+from agents.episode_stats import EpisodeStats
+from agents.random_stream import GLOBAL_STREAM
+
+__all__ = ["RolloutPool", "run_parallel_rounds"]
+
+# Copie de l'environnement propre à chaque processus de génération d'épisodes
+_worker_env = None
+
+
+def _init_worker(env):
+    global _worker_env
+    _worker_env = env
+
+
+def _run_task(task):
+    fn, seed, args = task
+    np.random.seed(seed)
+    return fn(_worker_env, *args)
+
+
+class RolloutPool:
+    # Pool de processus possédant chacun une copie de env ; fn(env, *args) doit être une fonction de module
+    def __init__(self, env, workers):
+        self.workers = workers
+        self._pool = Pool(processes=workers, initializer=_init_worker, initargs=(env,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.terminate()
+        self._pool.join()
+
+    def map(self, fn, args_list, rng=None):
+        # Graines tirées de rng (RandomStream de l'agent) ou du générateur global : une exécution reste
+        # reproductible avec seed= ou np.random.seed
+        seeds = (rng or GLOBAL_STREAM).integers(2 ** 31 - 1, size=len(args_list))
+        return self._pool.map(_run_task, [(fn, int(seed), args) for seed, args in zip(seeds, args_list)])
+
+
+def run_parallel_rounds(env, fn, make_args, merge, episodes, workers, sync_every, desc, rng=None):
+    # Par tour de sync_every épisodes : make_args(n) fige la politique courante pour n épisodes,
+    # fn(env, *args) renvoie des statistiques suffisantes (les EpisodeStats du processus en dernier)
+    # et merge(*stats) les intègre ; la politique améliorée part avec le tour suivant.
+    episode_stats = EpisodeStats()
+    with RolloutPool(env, workers) as pool, tqdm(total=episodes, desc=desc) as progress:
+        remaining = episodes
+        while remaining > 0:
+            batch = min(sync_every, remaining)
+            sizes = [n for n in np.diff(np.linspace(0, batch, workers + 1).astype(int)) if n > 0]
+            for stats in pool.map(fn, [make_args(n) for n in sizes], rng):
+                merge(*stats[:-1])
+                episode_stats.merge(stats[-1])
+            remaining -= batch
+            progress.update(batch)
+    return episode_stats
@@ -2,6 +2,10 @@ import numpy as np
 from tqdm import tqdm
 from collections import defaultdict
 
+from agents.policies import EpsilonGreedyCache
+from agents.random_stream import RandomStream
+from environments.step_protocol import as_step_env
+
 __all__ = ["dyna_q", "dyna_q_plus"]
 
 
@@ -17,15 +21,8 @@ def get_state(env):
     return env.get_state() if hasattr(env, "get_state") else env.state()
 
 
-def epsilon_greedy_policy(Q, epsilon):
-    num_states, num_actions = Q.shape
-    pi = np.ones((num_states, num_actions)) * (epsilon / num_actions)
-    best_actions = np.argmax(Q, axis=1)
-    pi[np.arange(num_states), best_actions] += 1.0 - epsilon
-    return pi
-
-
-def dyna_q(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, planning_steps=10):
+def dyna_q(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, planning_steps=10, seed=None):
+    env = as_step_env(env)
     num_states = get_num_states(env)
     num_actions = get_num_actions(env)
     Q = np.zeros((num_states, num_actions))
@@ -33,93 +30,86 @@ def dyna_q(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, planning_ste
     seen_state_action = set()
 
     steps_per_episode = []
+    rng = RandomStream(seed)
+    policy = EpsilonGreedyCache(Q, epsilon, rng)
 
     for _ in tqdm(range(episodes), desc="Dyna-Q"):
         env.reset()
         s = get_state(env)
-        old_score = env.score()
+        done = env.is_game_over()
         step_count = 0
 
-        while not env.is_game_over():
-            pi = epsilon_greedy_policy(Q, epsilon)
-            a = np.random.choice(num_actions, p=pi[s])
+        while not done:
+            a = policy.sample(s)
 
-            try:
-                env.step(a)
-            except TypeError:
-                env.step(s, a)
-
-            r = env.score() - old_score
-            old_score = env.score()
-            s_prime = get_state(env)
+            s_prime, r, done = env.step_transition(a)
 
             Q[s, a] += alpha * (r + gamma * np.max(Q[s_prime]) - Q[s, a])
+            touched = [s]
             model[s][a] = (r, s_prime)
             seen_state_action.add((s, a))
 
             for _ in range(planning_steps):
-                s_sim, a_sim = list(seen_state_action)[np.random.randint(len(seen_state_action))]
+                s_sim, a_sim = list(seen_state_action)[rng.integers(len(seen_state_action))]
                 r_sim, s_next_sim = model[s_sim][a_sim]
                 Q[s_sim, a_sim] += alpha * (r_sim + gamma * np.max(Q[s_next_sim]) - Q[s_sim, a_sim])
+                touched.append(s_sim)
+            policy.refresh(Q, touched)
 
             s = s_prime
             step_count += 1
 
         steps_per_episode.append(step_count)
 
-    return epsilon_greedy_policy(Q, epsilon), Q, steps_per_episode
+    return policy.policy(), Q, steps_per_episode
 
 
 def dyna_q_plus(env, episodes=1000, gamma=0.99, alpha=0.1, epsilon=0.1,
-                planning_steps=10, kappa=1e-4):
+                planning_steps=10, kappa=1e-4, seed=None):
+    env = as_step_env(env)
     num_states = get_num_states(env)
     num_actions = get_num_actions(env)
     Q = np.zeros((num_states, num_actions))
     model = defaultdict(dict)
-    time_since = defaultdict(lambda: defaultdict(lambda: 0))
+    last_visit = {}  # pas réel de la dernière visite de (s, a) : tau = pas courant - dernière visite
+    step = 0
     seen_state_action = set()
 
     steps_per_episode = []
+    rng = RandomStream(seed)
+    policy = EpsilonGreedyCache(Q, epsilon, rng)
 
     for _ in tqdm(range(episodes), desc="Dyna-Q+"):
         env.reset()
         s = get_state(env)
-        old_score = env.score()
+        done = env.is_game_over()
         step_count = 0
 
-        while not env.is_game_over():
-            pi = epsilon_greedy_policy(Q, epsilon)
-            a = np.random.choice(num_actions, p=pi[s])
-
-            try:
-                env.step(a)
-            except TypeError:
-                env.step(s, a)
+        while not done:
+            a = policy.sample(s)
 
-            r = env.score() - old_score
-            old_score = env.score()
-            s_prime = get_state(env)
+            s_prime, r, done = env.step_transition(a)
 
             Q[s, a] += alpha * (r + gamma * np.max(Q[s_prime]) - Q[s, a])
+            touched = [s]
             model[s][a] = (r, s_prime)
             seen_state_action.add((s, a))
-            time_since[s][a] = 0
-
-            for (ss, aa) in seen_state_action:
-                if (ss, aa) != (s, a):
-                    time_since[ss][aa] += 1
+            last_visit[s, a] = step
 
             for _ in range(planning_steps):
-                s_sim, a_sim = list(seen_state_action)[np.random.randint(len(seen_state_action))]
+                s_sim, a_sim = list(seen_state_action)[rng.integers(len(seen_state_action))]
                 r_sim, s_next_sim = model[s_sim][a_sim]
-                tau = time_since[s_sim][a_sim]
+                tau = step - last_visit[s_sim, a_sim]
                 bonus = kappa * np.sqrt(tau)
                 target = r_sim + bonus + gamma * np.max(Q[s_next_sim])
                 Q[s_sim, a_sim] += alpha * (target - Q[s_sim, a_sim])
+                touched.append(s_sim)
+            policy.refresh(Q, touched)
 
             s = s_prime
             step_count += 1
+            step += 1
 
         steps_per_episode.append(step_count)
 
-    return epsilon_greedy_policy(Q, epsilon), Q, steps_per_episode
+    return policy.policy(), Q, steps_per_episode
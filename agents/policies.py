@@ -0,0 +1,204 @@
+import numpy as np
+
+from agents.random_stream import GLOBAL_STREAM, RandomStream
+
+__all__ = ["GreedyPolicy", "TabularPolicy", "CumulativeSampler", "EpsilonGreedyCache"]
+
+
+class GreedyPolicy:
+    # Politique ε-gloutonne compacte : une action gloutonne et un epsilon par état.
+    # π dense (S, A) seulement sur demande (to_dense, pi[s], np.asarray(pi)) ; get(s) renvoie l'action gloutonne.
+    # valid_mask (S, A) optionnel : l'exploration est répartie sur les actions valides de chaque état.
+    def __init__(self, num_states, num_actions, epsilon=0.0, greedy=None, valid_mask=None):
+        self.num_actions = num_actions
+        self.greedy = np.zeros(num_states, dtype=np.int64) if greedy is None else np.asarray(greedy, dtype=np.int64)
+        self.epsilon = np.full(num_states, float(epsilon))
+        self.valid_mask = valid_mask
+
+    @classmethod
+    def from_q(cls, Q, epsilon=0.0, valid_mask=None):
+        policy = cls(Q.shape[0], Q.shape[1], epsilon, valid_mask=valid_mask)
+        policy.update(np.arange(Q.shape[0]), Q)
+        return policy
+
+    @property
+    def shape(self):
+        return len(self.greedy), self.num_actions
+
+    def __len__(self):
+        return len(self.greedy)
+
+    def copy(self):
+        valid_mask = None if self.valid_mask is None else self.valid_mask.copy()
+        policy = GreedyPolicy(len(self.greedy), self.num_actions, greedy=self.greedy.copy(), valid_mask=valid_mask)
+        policy.epsilon = self.epsilon.copy()
+        return policy
+
+    def update(self, states, Q, epsilon=None):
+        # Action gloutonne de Q pour les états donnés : O(A) par état
+        q = Q[states]
+        if self.valid_mask is not None:
+            q = np.where(self.valid_mask[states], q, -np.inf)
+        self.greedy[states] = np.argmax(q, axis=-1)
+        if epsilon is not None:
+            self.epsilon[states] = epsilon
+
+    def get(self, state, default=None):
+        # Accès façon dict {état: action}, comme les politiques des agents DP
+        if 0 <= state < len(self.greedy):
+            return int(self.greedy[state])
+        return default
+
+    def _row(self, state):
+        # Chemin rapide pour un seul état (boucles de génération d'épisodes)
+        epsilon = self.epsilon[state]
+        if self.valid_mask is None:
+            row = np.full(self.num_actions, epsilon / self.num_actions)
+        else:
+            valid = self.valid_mask[state]
+            row = np.where(valid, epsilon / max(valid.sum(), 1), 0.0)
+        row[self.greedy[state]] += 1.0 - epsilon
+        return row
+
+    def _rows(self, states):
+        if np.ndim(states) == 0:
+            return self._row(states)
+        states = np.asarray(states)
+        epsilon = self.epsilon[states][..., None]
+        if self.valid_mask is None:
+            rows = np.broadcast_to(epsilon / self.num_actions, states.shape + (self.num_actions,)).copy()
+        else:
+            valid = self.valid_mask[states]
+            rows = np.where(valid, epsilon / np.maximum(valid.sum(axis=-1, keepdims=True), 1), 0.0)
+        greedy = self.greedy[states][..., None]
+        np.put_along_axis(rows, greedy, np.take_along_axis(rows, greedy, axis=-1) + (1.0 - epsilon), axis=-1)
+        return rows
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            states, actions = key
+            if self.valid_mask is None:
+                # pi(a|s) directement, sans construire les lignes
+                epsilon = self.epsilon[states]
+                return epsilon / self.num_actions + (1.0 - epsilon) * (self.greedy[states] == actions)
+            rows = self._rows(states)
+            return rows[actions] if rows.ndim == 1 else rows[np.arange(len(rows)), actions]
+        return self._rows(key)
+
+    def to_dense(self):
+        return self._rows(np.arange(len(self.greedy)))
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.to_dense()
+        return dense if dtype is None else dense.astype(dtype)
+
+    def sample(self, states, rng=None):
+        # Tirage vectorisé : avec probabilité epsilon, action uniforme (parmi les actions valides si valid_mask),
+        # gloutonne sinon ; rng : RandomStream de l'agent, générateur global sinon
+        rng = rng or GLOBAL_STREAM
+        if np.ndim(states) == 0:
+            if rng.random() < self.epsilon[states]:
+                if self.valid_mask is None:
+                    return rng.integers(self.num_actions)
+                valid = np.flatnonzero(self.valid_mask[states])
+                if len(valid):
+                    return int(valid[rng.integers(len(valid))])
+            return int(self.greedy[states])
+        states = np.asarray(states)
+        actions = self.greedy[states].copy()
+        explore = rng.random(states.shape) < self.epsilon[states]
+        if self.valid_mask is None:
+            actions[explore] = rng.integers(self.num_actions, size=int(explore.sum()))
+            return actions
+        # Rang k uniforme parmi les actions valides, retrouvé sur leur cumul (état sans action valide : glouton)
+        counts = np.cumsum(self.valid_mask[states[explore]], axis=-1)
+        k = (rng.random(len(counts)) * counts[:, -1]).astype(np.int64)
+        drawn = (counts <= k[:, None]).sum(axis=-1)
+        actions[explore] = np.where(counts[:, -1] > 0, drawn, actions[explore])
+        return actions
+
+
+class TabularPolicy:
+    # Politique stochastique quelconque donnée par sa matrice (S, A) ; même interface que GreedyPolicy
+    def __init__(self, probs):
+        self.probs = np.asarray(probs, dtype=np.float64)
+        self.cdf = np.cumsum(self.probs, axis=1)
+        self.cdf /= self.cdf[:, -1:]
+
+    @property
+    def shape(self):
+        return self.probs.shape
+
+    def __len__(self):
+        return len(self.probs)
+
+    def get(self, state, default=None):
+        if 0 <= state < len(self.probs):
+            return int(np.argmax(self.probs[state]))
+        return default
+
+    def __getitem__(self, key):
+        return self.probs[key]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.probs if dtype is None else self.probs.astype(dtype)
+
+    def sample(self, states, rng=None):
+        rng = rng or GLOBAL_STREAM
+        if np.ndim(states) == 0:
+            return min(int(self.cdf[states].searchsorted(rng.random(), side="right")), self.probs.shape[1] - 1)
+        states = np.asarray(states)
+        u = rng.random(states.shape)[..., None]
+        return np.minimum((self.cdf[states] <= u).sum(axis=-1), self.probs.shape[1] - 1)
+
+
+class CumulativeSampler:
+    # Tables cumulatives par état, normalisées comme dans np.random.choice. sample(s, rng) équivaut à
+    # np.random.choice(A, p=probs[s]) sans la validation ni le cumsum à chaque appel, l'uniforme venant du
+    # bloc pré-tiré de rng ; update(states, rows) resynchronise les seules lignes modifiées de la politique.
+    def __init__(self, probs):
+        probs = np.asarray(probs, dtype=np.float64)
+        self.cdf = np.empty_like(probs)
+        self.update(np.arange(len(probs)), probs)
+
+    def update(self, states, rows):
+        cdf = np.cumsum(rows, axis=-1)
+        cdf /= cdf[..., -1:]
+        self.cdf[states] = cdf
+
+    def sample(self, state, rng=None):
+        return int(self.cdf[state].searchsorted((rng or GLOBAL_STREAM).random(), side="right"))
+
+
+class EpsilonGreedyCache:
+    # Politique ε-gloutonne dense de Q tenue à jour ligne par ligne : refresh(Q, states) recalcule l'action
+    # gloutonne, la ligne de π et la table cumulative des seuls états dont Q a changé, en O(A) par état.
+    # Mêmes valeurs que epsilon_greedy_policy(Q, epsilon) reconstruite à chaque pas.
+    # rng : RandomStream de l'agent (un flux propre tiré du générateur global par défaut)
+    def __init__(self, Q, epsilon, rng=None):
+        self.epsilon = epsilon
+        self.rng = rng if rng is not None else RandomStream()
+        self.greedy, self.probs = self._rows(Q)
+        self.sampler = CumulativeSampler(self.probs)
+
+    def _rows(self, q):
+        greedy = np.argmax(q, axis=-1)
+        rows = np.full(q.shape, self.epsilon / q.shape[-1])
+        rows[np.arange(len(q)), greedy] += 1.0 - self.epsilon
+        return greedy, rows
+
+    def refresh(self, Q, states):
+        greedy, rows = self._rows(Q[states])
+        self.greedy[states] = greedy
+        self.probs[states] = rows
+        self.sampler.update(states, rows)
+
+    def sample(self, state):
+        return self.sampler.sample(state, self.rng)
+
+    def expected_value(self, Q, state):
+        # Espérance de Q[state] sous la politique (cible d'Expected SARSA)
+        return np.dot(self.probs[state], Q[state])
+
+    def policy(self):
+        return GreedyPolicy(len(self.greedy), self.probs.shape[1], self.epsilon, greedy=self.greedy.copy())
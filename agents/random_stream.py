@@ -0,0 +1,48 @@
+import numpy as np
+
+__all__ = ["RandomStream", "GLOBAL_STREAM", "UNIFORM_BLOCK_SIZE"]
+
+# Taille par défaut des blocs de tirages uniformes pré-générés
+UNIFORM_BLOCK_SIZE = 4096
+
+
+class RandomStream:
+    # Flux aléatoire propre à un agent, sur un np.random.Generator : les tirages scalaires (random(),
+    # integers(high)) sont servis depuis un bloc d'uniformes renouvelé en une fois, les tirages vectoriels
+    # (size=...) passent directement par le générateur.
+    # seed None : graine tirée du générateur global, une exécution reste reproductible avec np.random.seed.
+    def __init__(self, seed=None, block_size=UNIFORM_BLOCK_SIZE):
+        if seed is None:
+            seed = np.random.randint(0, 2 ** 31 - 1)
+        self.generator = np.random.default_rng(seed)
+        self.block_size = block_size
+        self._uniforms = np.empty(0)
+        self._next = 0
+
+    def random(self, size=None):
+        if size is not None:
+            return self.generator.random(size)
+        if self._next == len(self._uniforms):
+            self._uniforms = self.generator.random(self.block_size)
+            self._next = 0
+        u = self._uniforms[self._next]
+        self._next += 1
+        return u
+
+    def integers(self, high, size=None):
+        # Entier uniforme dans [0, high[
+        if size is not None:
+            return self.generator.integers(high, size=size)
+        return min(int(self.random() * high), high - 1)
+
+
+class _GlobalStream:
+    # Même interface sur le générateur global np.random (comportement des agents sans flux propre)
+    def random(self, size=None):
+        return np.random.random(size)
+
+    def integers(self, high, size=None):
+        return np.random.randint(high, size=size)
+
+
+GLOBAL_STREAM = _GlobalStream()
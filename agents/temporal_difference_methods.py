@@ -1,6 +1,10 @@
 import numpy as np
 from tqdm import tqdm
 
+from agents.policies import EpsilonGreedyCache, GreedyPolicy
+from agents.random_stream import RandomStream
+from environments.step_protocol import as_step_env
+
 __all__ = ["sarsa", "q_learning", "expected_sarsa"]
 
 
@@ -12,49 +16,37 @@ def get_num_states(env):
     return env.num_states() if callable(env.num_states) else env.num_states
 
 
-def epsilon_greedy_policy(Q, epsilon):
-    num_states, num_actions = Q.shape
-    policy = np.ones((num_states, num_actions)) * (epsilon / num_actions)
-    best_actions = np.argmax(Q, axis=1)
-    policy[np.arange(num_states), best_actions] += 1.0 - epsilon
-    return policy
-
-
 def extract_deterministic_policy(Q):
-    return {s: int(np.argmax(Q[s])) for s in range(Q.shape[0])}
+    return GreedyPolicy.from_q(Q)
 
 
-def sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1):
+def sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, seed=None):
+    env = as_step_env(env)
     num_states = get_num_states(env)
     num_actions = get_num_actions(env)
     Q = np.zeros((num_states, num_actions))
     steps_per_episode = []
 
+    policy = EpsilonGreedyCache(Q, epsilon, RandomStream(seed))
+
     for _ in tqdm(range(episodes), desc="SARSA"):
         env.reset()
         s = env.get_state()
-        pi = epsilon_greedy_policy(Q, epsilon)
-        a = np.random.choice(num_actions, p=pi[s])
-        old_score = env.score()
+        a = policy.sample(s)
+        done = env.is_game_over()
         step_count = 0
 
-        while not env.is_game_over():
-            try:
-                env.step(a)
-            except TypeError:
-                env.step(s, a)
-
-            r = env.score() - old_score
-            old_score = env.score()
-            s_prime = env.get_state()
+        while not done:
+            s_prime, r, done = env.step_transition(a)
 
-            pi = epsilon_greedy_policy(Q, epsilon)
-            if env.is_game_over():
+            if done:
                 Q[s, a] += alpha * (r - Q[s, a])
+                policy.refresh(Q, [s])
                 break
 
-            a_prime = np.random.choice(num_actions, p=pi[s_prime])
+            a_prime = policy.sample(s_prime)
             Q[s, a] += alpha * (r + gamma * Q[s_prime, a_prime] - Q[s, a])
+            policy.refresh(Q, [s])
 
             s = s_prime
             a = a_prime
@@ -62,38 +54,39 @@ def sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1):
 
         steps_per_episode.append(step_count)
 
-    return epsilon_greedy_policy(Q, epsilon), Q, steps_per_episode
+    return policy.policy(), Q, steps_per_episode
 
 
-def q_learning(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.3):
+def q_learning(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.3, seed=None):
+    env = as_step_env(env)
     num_states = get_num_states(env)
     num_actions = get_num_actions(env)
     Q = np.zeros((num_states, num_actions))
     steps_per_episode = []
 
+    # Politique de comportement figée pendant un épisode : resynchronisée au début du suivant sur les
+    # seuls états mis à jour
+    policy = EpsilonGreedyCache(Q, epsilon, RandomStream(seed))
+    updated = []
+
     for _ in tqdm(range(episodes), desc="Q-Learning"):
         env.reset()
         s = env.get_state()
-        pi = epsilon_greedy_policy(Q, epsilon)
-        old_score = env.score()
+        policy.refresh(Q, updated)
+        updated.clear()
+        done = env.is_game_over()
         step_count = 0
 
-        while not env.is_game_over():
-            a = np.random.choice(num_actions, p=pi[s])
-            try:
-                env.step(a)
-            except TypeError:
-                env.step(s, a)
-
-            r = env.score() - old_score
-            old_score = env.score()
-            s_prime = env.get_state()
+        while not done:
+            a = policy.sample(s)
+            s_prime, r, done = env.step_transition(a)
 
-            if not env.is_game_over():
+            if not done:
                 target = r + gamma * np.max(Q[s_prime])
             else:
                 target = r
             Q[s, a] += alpha * (target - Q[s, a])
+            updated.append(s)
             s = s_prime
             step_count += 1
 
@@ -102,41 +95,37 @@ def q_learning(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.3):
     return extract_deterministic_policy(Q), Q, steps_per_episode
 
 
-def expected_sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1):
+def expected_sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, seed=None):
+    env = as_step_env(env)
     num_states = get_num_states(env)
     num_actions = get_num_actions(env)
     Q = np.zeros((num_states, num_actions))
     steps_per_episode = []
 
+    policy = EpsilonGreedyCache(Q, epsilon, RandomStream(seed))
+
     for _ in tqdm(range(episodes), desc="Expected SARSA"):
         env.reset()
         s = env.get_state()
-        old_score = env.score()
+        done = env.is_game_over()
         step_count = 0
 
-        while not env.is_game_over():
-            pi = epsilon_greedy_policy(Q, epsilon)
-            a = np.random.choice(num_actions, p=pi[s])
-
-            try:
-                env.step(a)
-            except TypeError:
-                env.step(s, a)
+        while not done:
+            a = policy.sample(s)
 
-            r = env.score() - old_score
-            old_score = env.score()
-            s_prime = env.get_state()
+            s_prime, r, done = env.step_transition(a)
 
-            if env.is_game_over():
+            if done:
                 Q[s, a] += alpha * (r - Q[s, a])
+                policy.refresh(Q, [s])
                 break
 
-            pi_prime = epsilon_greedy_policy(Q, epsilon)
-            expected_q = np.dot(pi_prime[s_prime], Q[s_prime])
+            expected_q = policy.expected_value(Q, s_prime)
             Q[s, a] += alpha * (r + gamma * expected_q - Q[s, a])
+            policy.refresh(Q, [s])
             s = s_prime
             step_count += 1
 
         steps_per_episode.append(step_count)
 
-    return epsilon_greedy_policy(Q, epsilon), Q, steps_per_episode
+    return policy.policy(), Q, steps_per_episode
@@ -0,0 +1,15 @@
+from agents import dynamic_programming
+from environments.secret_mdp_cache import load_secret_mdp
+
+__all__ = ["policy_iteration", "value_iteration"]
+
+
+# Le modèle du SecretEnv est extrait une fois puis relu depuis le cache ; les états sont les state_id()
+def policy_iteration(env, gamma=0.99, theta=1e-6):
+    policy, V = dynamic_programming.policy_iteration(load_secret_mdp(env), gamma=gamma, theta=theta)
+    return {"policy": policy, "V": V}
+
+
+def value_iteration(env, gamma=0.99, theta=1e-5):
+    policy, V = dynamic_programming.value_iteration(load_secret_mdp(env), gamma=gamma, theta=theta)
+    return {"policy": policy, "V": V}
@@ -0,0 +1,83 @@
+from collections import defaultdict
+
+from agents.random_stream import RandomStream
+
+__all__ = ["StartStatePool"]
+
+
+class StartStatePool:
+    # Départs explorateurs : start() renvoie (env, état) avec un état tiré uniformément parmi les états
+    # non terminaux connus. Avec reset_to(état, action), l'environnement lui-même est repositionné ;
+    # sinon (SecretEnvX), on garde une réserve d'instances type(env).from_random_state() rangées par
+    # state_id(), chaque instance ne servant qu'à un épisode. Les états rares ne sont ainsi pas
+    # sous-représentés comme avec un tirage direct de from_random_state().
+    # rng : RandomStream de l'agent pour le choix des départs (un flux propre tiré du générateur global par
+    # défaut) ; les tirages internes de from_random_state() restent ceux de la bibliothèque.
+    def __init__(self, env, initial_draws=256, refill_draws=32, bucket_size=4, rng=None):
+        self.env = env
+        self.rng = rng if rng is not None else RandomStream()
+        self.refill_draws = refill_draws
+        self.bucket_size = bucket_size
+        self._use_reset_to = callable(getattr(env, "reset_to", None))
+        self._from_random_state = getattr(type(env), "from_random_state", None)
+        if not self._use_reset_to and self._from_random_state is None:
+            raise ValueError("Les départs explorateurs demandent reset_to ou from_random_state")
+
+        self._buckets = defaultdict(list)
+        self._terminal = set()
+        self._known = set()
+        if self._use_reset_to:
+            num_states = env.num_states() if callable(env.num_states) else env.num_states
+            self.states = list(range(num_states))
+        else:
+            self.states = []
+            self._draw(initial_draws)
+
+    def _draw(self, n):
+        # n instances depuis un état aléatoire ; seuls les états où une action est possible sont gardés
+        for _ in range(n):
+            instance = self._from_random_state()
+            s = instance.state_id()
+            if s in self._terminal:
+                continue
+            if instance.is_game_over() or len(instance.available_actions()) == 0:
+                self._terminal.add(s)
+                continue
+            if s not in self._known:
+                self._known.add(s)
+                self.states.append(s)
+            bucket = self._buckets[s]
+            if len(bucket) < self.bucket_size:
+                bucket.append(instance)
+
+    def _start_reset_to(self):
+        while self.states:
+            i = self.rng.integers(len(self.states))
+            s = self.states[i]
+            self.env.reset_to(s, None)
+            if not self.env.is_game_over():
+                return self.env, s
+            # État terminal : retiré du tirage
+            self.states[i] = self.states[-1]
+            self.states.pop()
+        return None
+
+    def start(self):
+        # None si aucun état de départ n'a pu être trouvé
+        if self._use_reset_to:
+            return self._start_reset_to()
+        if not self.states:
+            self._draw(self.refill_draws)
+            if not self.states:
+                return None
+
+        s = self.states[self.rng.integers(len(self.states))]
+        if not self._buckets[s]:
+            self._draw(self.refill_draws)
+        if not self._buckets[s]:
+            # État rare non retrouvé : repli sur un état dont la réserve n'est pas vide
+            available = [state for state in self.states if self._buckets[state]]
+            if not available:
+                return None
+            s = available[self.rng.integers(len(available))]
+        return self._buckets[s].pop(), s
@@ -1,6 +1,14 @@
 import numpy as np
 from tqdm import tqdm
 
+from agents.episode_buffer import EpisodeBuffer
+from agents.importance_sampling import ESTIMATORS, off_policy_update
+from agents.mc_returns import discounted_returns, first_visit_indices, incremental_mean_update
+from agents.policies import GreedyPolicy
+from agents.random_stream import RandomStream
+from agents_for_secret_envs.exploring_starts import StartStatePool
+from environments.step_protocol import as_step_env
+
 
 def get_num_states(env):
     return env.num_states() if callable(env.num_states) else env.num_states
@@ -11,168 +19,160 @@ def get_num_actions(env):
 
 
 def greedy_policy_from_q(Q):
-    num_states, num_actions = Q.shape
-    pi = np.zeros((num_states, num_actions))
-    for s in range(num_states):
-        best_a = np.argmax(Q[s])
-        pi[s, best_a] = 1.0
-    return pi
+    return GreedyPolicy.from_q(Q)
+
+
+def _greedy_action(q_values, actions, rng):
+    # Action de valeur maximale parmi actions, égalités départagées au hasard (Q encore nul au début)
+    values = q_values[actions]
+    best = np.flatnonzero(values == values.max())
+    return actions[best[rng.integers(len(best))]]
 
 
-def on_policy_first_visit_mc_control(env, episodes=10000, gamma=0.99, epsilon=0.1):
+def on_policy_first_visit_mc_control(env, episodes=10000, gamma=0.99, epsilon=0.1, seed=None):
+    env = as_step_env(env)
     num_states = get_num_states(env)
     num_actions = get_num_actions(env)
 
     Q = np.zeros((num_states, num_actions))
     returns_count = np.zeros((num_states, num_actions))
-    pi = np.zeros((num_states, num_actions))
+    valid_mask = np.zeros((num_states, num_actions), dtype=bool)  # actions vues comme valides dans chaque état
+    # Uniforme sur les actions valides tant que l'état n'a pas été mis à jour
+    pi = GreedyPolicy(num_states, num_actions, epsilon=1.0, valid_mask=valid_mask)
+    rng = RandomStream(seed)
 
-    for state in range(num_states):
-        valid_actions = env.available_actions()
-        if len(valid_actions) > 0:
-            for a in valid_actions:
-                pi[state, a] = 1.0 / len(valid_actions)
+    episode = EpisodeBuffer()
 
     for _ in tqdm(range(episodes), desc="MC Control ε-soft"):
         env.reset()
         s = env.state_id()
-        old_score = env.score()
+        done = env.is_game_over()
 
-        states, actions, rewards = [], [], []
+        episode.clear()
 
-        while not env.is_game_over():
+        while not done:
             valid_actions = env.available_actions()
             if len(valid_actions) == 0:
                 break
 
-            action_probs = np.array([pi[s, a] if a in valid_actions else 0 for a in range(num_actions)])
-            action_probs /= action_probs.sum()
-            a = np.random.choice(np.arange(num_actions), p=action_probs)
-
-            env.step(a)
-            r = env.score() - old_score
-            old_score = env.score()
-
-            states.append(s)
-            actions.append(a)
-            rewards.append(r)
-
-            s = env.state_id()
+            valid_mask[s, valid_actions] = True
+            a = pi.sample(s, rng)
 
-        G = 0
-        visited = set()
+            s_prime, r, done = env.step_transition(a)
+            episode.append(s, a, r)
+            s = s_prime
 
-        for t in reversed(range(len(states))):
-            s_t, a_t, r_tp1 = states[t], actions[t], rewards[t]
-            G = gamma * G + r_tp1
-            if (s_t, a_t) not in visited:
-                visited.add((s_t, a_t))
-                returns_count[s_t, a_t] += 1
-                Q[s_t, a_t] += (G - Q[s_t, a_t]) / returns_count[s_t, a_t]
+        if len(episode) == 0:
+            continue
 
-                valid_actions = env.available_actions()
-                if len(valid_actions) == 0:
-                    continue
+        states, actions, rewards = episode.views()
+        G = discounted_returns(rewards, gamma)
+        first = first_visit_indices(states, actions, num_actions)
+        incremental_mean_update(Q, returns_count, states[first], actions[first], G[first])
 
-                best_a = max(valid_actions, key=lambda a: Q[s_t, a])
-                for a in range(num_actions):
-                    pi[s_t, a] = epsilon / len(valid_actions) if a in valid_actions else 0
-                pi[s_t, best_a] += 1.0 - epsilon
+        # ε-greedy restreint aux actions valides de chaque état visité
+        pi.update(np.unique(states[first]), Q, epsilon)
 
     return pi, Q
 
 
-def monte_carlo_es(env, episodes=10000, gamma=0.99, max_steps=100):
+def monte_carlo_es(env, episodes=10000, gamma=0.99, max_steps=100, seed=None):
+    # Départs (état, action) explorateurs via StartStatePool (reset_to ou from_random_state), puis politique
+    # gloutonne restreinte aux actions valides, égalités départagées au hasard
     num_states = get_num_states(env)
     num_actions = get_num_actions(env)
 
     Q = np.zeros((num_states, num_actions))
     returns_count = np.zeros((num_states, num_actions))
-    pi = greedy_policy_from_q(Q)
+    valid_mask = np.zeros((num_states, num_actions), dtype=bool)
+    pi = GreedyPolicy.from_q(Q, valid_mask=valid_mask)
+    rng = RandomStream(seed)
+    starts = StartStatePool(env, rng=rng)
 
-    for _ in tqdm(range(episodes), desc="Monte Carlo Exploring Starts"):
-        s0 = np.random.randint(0, num_states)
-        valid_actions = env.available_actions()
-        if len(valid_actions) == 0:
-            continue
-        a0 = np.random.choice(valid_actions)
+    episode = EpisodeBuffer()
 
-        try:
-            env.reset_to(s0, a0)
-        except Exception:
-            continue
-
-        episode = []
-        old_score = env.score()
-        s, a = s0, a0
+    for _ in tqdm(range(episodes), desc="Monte Carlo Exploring Starts"):
+        start = starts.start()
+        if start is None:
+            print("Aucun état de départ disponible pour les départs explorateurs.")
+            break
+        start_env, s = start
+        start_env = as_step_env(start_env)
+        valid_actions = start_env.available_actions()
+        valid_mask[s, valid_actions] = True
+        a = valid_actions[rng.integers(len(valid_actions))]
+
+        episode.clear()
+        done = start_env.is_game_over()
         step_count = 0
 
-        while not env.is_game_over() and step_count < max_steps:
-            env.step(a)
-            r = env.score() - old_score
-            old_score = env.score()
-            episode.append((s, a, r))
+        while not done and step_count < max_steps:
+            s_prime, r, done = start_env.step_transition(a)
+            episode.append(s, a, r)
 
-            s = env.state_id()
-            actions = env.available_actions()
+            s = s_prime
+            actions = start_env.available_actions()
             if len(actions) == 0:
                 break
-            a = np.random.choice(actions)
+            valid_mask[s, actions] = True
+            a = _greedy_action(Q[s], actions, rng)
             step_count += 1
 
-        G = 0
-        visited = set()
-        for t in reversed(range(len(episode))):
-            s_t, a_t, r_tp1 = episode[t]
-            G = gamma * G + r_tp1
-            if (s_t, a_t) not in visited:
-                visited.add((s_t, a_t))
-                returns_count[s_t, a_t] += 1
-                Q[s_t, a_t] += (G - Q[s_t, a_t]) / returns_count[s_t, a_t]
-                best_a = np.argmax(Q[s_t])
-                pi[s_t] = np.eye(num_actions)[best_a]
+        if len(episode) == 0:
+            continue
+
+        ep_states, ep_actions, ep_rewards = episode.views()
+        G = discounted_returns(ep_rewards, gamma)
+        first = first_visit_indices(ep_states, ep_actions, num_actions)
+        incremental_mean_update(Q, returns_count, ep_states[first], ep_actions[first], G[first])
+
+        pi.update(np.unique(ep_states[first]), Q)
 
     return pi, Q
 
 
-def off_policy_mc_control(env, gamma=0.99, episodes=10000, max_steps=100):
+def off_policy_mc_control(env, gamma=0.99, episodes=10000, max_steps=100, estimator="weighted", seed=None):
+    # Comportement uniforme sur les actions valides de chaque état ; estimator : clé de ESTIMATORS
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Estimateur d'échantillonnage préférentiel inconnu : {estimator}")
+
+    env = as_step_env(env)
     num_states = get_num_states(env)
     num_actions = get_num_actions(env)
 
     Q = np.zeros((num_states, num_actions))
-    C = np.zeros((num_states, num_actions))
+    numerators = np.zeros((num_states, num_actions))
+    denominators = np.zeros((num_states, num_actions))
     pi = greedy_policy_from_q(Q)
+    rng = RandomStream(seed)
+
+    episode = EpisodeBuffer()
+    behavior_probs = []
 
     for _ in tqdm(range(episodes), desc="Off-Policy MC Control"):
         env.reset()
+        episode.clear()
+        behavior_probs.clear()
         s = env.state_id()
-        old_score = env.score()
-        episode = []
+        done = env.is_game_over()
         step_count = 0
 
-        while not env.is_game_over() and step_count < max_steps:
+        while not done and step_count < max_steps:
             valid_actions = env.available_actions()
             if len(valid_actions) == 0:
                 break
-            a = np.random.choice(valid_actions)
-            env.step(a)
-            r = env.score() - old_score
-            old_score = env.score()
-            episode.append((s, a, r))
-            s = env.state_id()
+            a = valid_actions[rng.integers(len(valid_actions))]
+            behavior_probs.append(1.0 / len(valid_actions))
+            s_prime, r, done = env.step_transition(a)
+            episode.append(s, a, r)
+            s = s_prime
             step_count += 1
 
-        G = 0
-        W = 1
-        for t in reversed(range(len(episode))):
-            s_t, a_t, r_tp1 = episode[t]
-            G = gamma * G + r_tp1
-            C[s_t, a_t] += W
-            Q[s_t, a_t] += (W / C[s_t, a_t]) * (G - Q[s_t, a_t])
-            best_a = np.argmax(Q[s_t])
-            pi[s_t] = np.eye(num_actions)[best_a]
-            if a_t != best_a:
-                break
-            W *= 1.0 / (1.0 / len(env.available_actions()))
+        if len(episode) == 0:
+            continue
+
+        # Probabilités de comportement relevées à chaque pas (et non sur l'état final de l'épisode)
+        off_policy_update(Q, numerators, denominators, pi, *episode.views(), np.array(behavior_probs), gamma,
+                          estimator)
 
     return pi, Q
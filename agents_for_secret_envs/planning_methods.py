@@ -2,6 +2,9 @@ import numpy as np
 from tqdm import tqdm
 from collections import defaultdict
 
+from agents.random_stream import RandomStream
+from environments.step_protocol import as_step_env
+
 __all__ = ["dyna_q", "dyna_q_plus"]
 
 
@@ -13,7 +16,16 @@ def get_state(env):
     return env.state_id() if hasattr(env, "state_id") else env.state()
 
 
-def dyna_q(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, planning_steps=10):
+def epsilon_greedy_action(Q, s, actions, epsilon, rng):
+    # Avec probabilité epsilon, indice uniforme dans la liste des actions ; gloutonne sinon
+    if rng.random() < epsilon:
+        return actions[rng.integers(len(actions))]
+    return actions[int(np.argmax([Q[s][a] for a in actions]))]
+
+
+def dyna_q(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, planning_steps=10, seed=None):
+    env = as_step_env(env)
+    rng = RandomStream(seed)
     Q = defaultdict(lambda: defaultdict(float))  # Q-table
     model = defaultdict(dict)  # (s, a) -> (r, s')
     seen_state_action = set()  # pour les plans
@@ -21,30 +33,23 @@ def dyna_q(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, planning_ste
     for _ in tqdm(range(episodes), desc="Dyna-Q"):
         env.reset()
         s = get_state(env)
-        old_score = env.score()
+        done = env.is_game_over()
 
-        while not env.is_game_over():
+        while not done:
             actions = to_list(env.available_actions())
             if not actions:
                 break
 
-            q_vals = [Q[s][a] for a in actions]
-            pi = np.ones(len(actions)) * (epsilon / len(actions))
-            best_idx = int(np.argmax(q_vals))
-            pi[best_idx] += 1.0 - epsilon
-            a = np.random.choice(actions, p=pi)
+            a = epsilon_greedy_action(Q, s, actions, epsilon, rng)
 
-            env.step(a)
-            r = env.score() - old_score
-            old_score = env.score()
-            s_prime = get_state(env)
+            s_prime, r, done = env.step_transition(a)
 
             Q[s][a] += alpha * (r + gamma * max(Q[s_prime].values(), default=0) - Q[s][a])
             model[s][a] = (r, s_prime)
             seen_state_action.add((s, a))
 
             for _ in range(planning_steps):
-                s_sim, a_sim = list(seen_state_action)[np.random.randint(len(seen_state_action))]
+                s_sim, a_sim = list(seen_state_action)[rng.integers(len(seen_state_action))]
                 r_sim, s_next_sim = model[s_sim][a_sim]
                 Q[s_sim][a_sim] += alpha * (
                         r_sim + gamma * max(Q[s_next_sim].values(), default=0) - Q[s_sim][a_sim]
@@ -57,7 +62,9 @@ def dyna_q(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, planning_ste
 
 
 def dyna_q_plus(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1,
-                planning_steps=10, kappa=1e-4):
+                planning_steps=10, kappa=1e-4, seed=None):
+    env = as_step_env(env)
+    rng = RandomStream(seed)
     Q = defaultdict(lambda: defaultdict(float))  # Q-table
     model = defaultdict(dict)  # modèle pour le planning
     time_since = defaultdict(lambda: defaultdict(int))  # temps depuis la dernière visite
@@ -66,23 +73,16 @@ def dyna_q_plus(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1,
     for _ in tqdm(range(episodes), desc="Dyna-Q+"):
         env.reset()
         s = get_state(env)
-        old_score = env.score()
+        done = env.is_game_over()
 
-        while not env.is_game_over():
+        while not done:
             actions = to_list(env.available_actions())
             if not actions:
                 break
 
-            q_vals = [Q[s][a] for a in actions]
-            pi = np.ones(len(actions)) * (epsilon / len(actions))
-            best_idx = int(np.argmax(q_vals))
-            pi[best_idx] += 1.0 - epsilon
-            a = np.random.choice(actions, p=pi)
+            a = epsilon_greedy_action(Q, s, actions, epsilon, rng)
 
-            env.step(a)
-            r = env.score() - old_score
-            old_score = env.score()
-            s_prime = get_state(env)
+            s_prime, r, done = env.step_transition(a)
 
             Q[s][a] += alpha * (r + gamma * max(Q[s_prime].values(), default=0) - Q[s][a])
             model[s][a] = (r, s_prime)
@@ -94,7 +94,7 @@ def dyna_q_plus(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1,
                     time_since[ss][aa] += 1
 
             for _ in range(planning_steps):
-                s_sim, a_sim = list(seen_state_action)[np.random.randint(len(seen_state_action))]
+                s_sim, a_sim = list(seen_state_action)[rng.integers(len(seen_state_action))]
                 r_sim, s_next_sim = model[s_sim][a_sim]
                 tau = time_since[s_sim][a_sim]
                 bonus = kappa * np.sqrt(tau)
@@ -1,6 +1,10 @@
 import numpy as np
 from tqdm import tqdm
 
+from agents.policies import GreedyPolicy
+from agents.random_stream import RandomStream
+from environments.step_protocol import as_step_env
+
 __all__ = ["sarsa", "q_learning", "expected_sarsa"]
 
 
@@ -13,21 +17,23 @@ def get_state(env):
 
 
 def extract_deterministic_policy(Q):
-    return {s: int(np.argmax(Q[s])) for s in range(Q.shape[0])}
+    return GreedyPolicy.from_q(Q)
 
 
-def epsilon_greedy_action(Q, s, available_actions, epsilon):
+def epsilon_greedy_action(Q, s, available_actions, epsilon, rng):
+    # Avec probabilité epsilon, indice uniforme dans la liste des actions disponibles ; gloutonne sinon
     available_actions = to_list(available_actions)
     if not available_actions:
         return None
-    probs = np.ones(len(available_actions)) * (epsilon / len(available_actions))
+    if rng.random() < epsilon:
+        return available_actions[rng.integers(len(available_actions))]
     q_values = [Q[s, a] for a in available_actions]
-    best_idx = int(np.argmax(q_values))
-    probs[best_idx] += 1.0 - epsilon
-    return np.random.choice(available_actions, p=probs)
+    return available_actions[int(np.argmax(q_values))]
 
 
-def sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1):
+def sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, seed=None):
+    env = as_step_env(env)
+    rng = RandomStream(seed)
     num_states = env.num_states()
     num_actions = env.num_actions()
     Q = np.zeros((num_states, num_actions))
@@ -35,28 +41,25 @@ def sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1):
     for _ in tqdm(range(episodes), desc="SARSA"):
         env.reset()
         s = get_state(env)
-        old_score = env.score()
+        done = env.is_game_over()
         available = to_list(env.available_actions())
         if not available:
             continue
-        a = epsilon_greedy_action(Q, s, available, epsilon)
+        a = epsilon_greedy_action(Q, s, available, epsilon, rng)
         if a is None:
             continue
 
-        while not env.is_game_over():
-            env.step(a)
-            r = env.score() - old_score
-            old_score = env.score()
-            s_prime = get_state(env)
+        while not done:
+            s_prime, r, done = env.step_transition(a)
 
-            if env.is_game_over():
+            if done:
                 Q[s, a] += alpha * (r - Q[s, a])
                 break
 
             available_prime = to_list(env.available_actions())
             if not available_prime:
                 break
-            a_prime = epsilon_greedy_action(Q, s_prime, available_prime, epsilon)
+            a_prime = epsilon_greedy_action(Q, s_prime, available_prime, epsilon, rng)
             if a_prime is None:
                 break
             Q[s, a] += alpha * (r + gamma * Q[s_prime, a_prime] - Q[s, a])
@@ -66,7 +69,9 @@ def sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1):
     return {"policy": policy, "Q": Q}
 
 
-def q_learning(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.3):
+def q_learning(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.3, seed=None):
+    env = as_step_env(env)
+    rng = RandomStream(seed)
     num_states = env.num_states()
     num_actions = env.num_actions()
     Q = np.zeros((num_states, num_actions))
@@ -74,22 +79,19 @@ def q_learning(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.3):
     for _ in tqdm(range(episodes), desc="Q-Learning"):
         env.reset()
         s = get_state(env)
-        old_score = env.score()
+        done = env.is_game_over()
 
-        while not env.is_game_over():
+        while not done:
             available = to_list(env.available_actions())
             if not available:
                 break
-            a = epsilon_greedy_action(Q, s, available, epsilon)
+            a = epsilon_greedy_action(Q, s, available, epsilon, rng)
             if a is None:
                 break
 
-            env.step(a)
-            r = env.score() - old_score
-            old_score = env.score()
-            s_prime = get_state(env)
+            s_prime, r, done = env.step_transition(a)
 
-            if env.is_game_over():
+            if done:
                 Q[s, a] += alpha * (r - Q[s, a])
                 break
 
@@ -105,7 +107,9 @@ def q_learning(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.3):
     return {"policy": policy, "Q": Q}
 
 
-def expected_sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1):
+def expected_sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1, seed=None):
+    env = as_step_env(env)
+    rng = RandomStream(seed)
     num_states = env.num_states()
     num_actions = env.num_actions()
     Q = np.zeros((num_states, num_actions))
@@ -113,22 +117,19 @@ def expected_sarsa(env, episodes=10000, gamma=0.99, alpha=0.1, epsilon=0.1):
     for _ in tqdm(range(episodes), desc="Expected SARSA"):
         env.reset()
         s = get_state(env)
-        old_score = env.score()
+        done = env.is_game_over()
 
-        while not env.is_game_over():
+        while not done:
             available = to_list(env.available_actions())
             if not available:
                 break
-            a = epsilon_greedy_action(Q, s, available, epsilon)
+            a = epsilon_greedy_action(Q, s, available, epsilon, rng)
             if a is None:
                 break
 
-            env.step(a)
-            r = env.score() - old_score
-            old_score = env.score()
-            s_prime = get_state(env)
+            s_prime, r, done = env.step_transition(a)
 
-            if env.is_game_over():
+            if done:
                 Q[s, a] += alpha * (r - Q[s, a])
                 break
 
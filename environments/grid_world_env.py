@@ -1,4 +1,7 @@
 class GridWorldEnv:
+    # get_transitions décrit exactement step : simulable par environments.vector_env
+    vectorizable = True
+
     def __init__(self, width=5, height=5, start=(0, 0), walls=None):
         self.width = width
         self.height = height
@@ -41,6 +44,10 @@ class GridWorldEnv:
         self.agent_pos = next_state
         return next_state, reward
 
+    def step_transition(self, action):
+        next_state, reward = self.step(action)
+        return self.state_to_index[next_state], reward, next_state in self.terminal_states
+
     def get_state(self):
         return self.state_to_index[self.agent_pos]
 
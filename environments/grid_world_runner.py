@@ -96,8 +96,9 @@ class GridWorldRunner:
                         self.policy = policy_raw
                 else:
                     from agents.temporal_difference_methods import extract_deterministic_policy
-                    raw_policy = extract_deterministic_policy(policy_raw)
-                    self.policy = {self.env.index_to_state[s]: a for s, a in raw_policy.items()}
+                    # GreedyPolicy / TabularPolicy : get(s) donne l'action de l'état ; une matrice π passe par argmax
+                    pi = policy_raw if hasattr(policy_raw, "get") else extract_deterministic_policy(policy_raw)
+                    self.policy = {self.env.index_to_state[s]: pi.get(s) for s in range(len(pi))}
 
 
             except Exception as e:
@@ -1,4 +1,7 @@
 class LineWorldEnv:
+    # get_transitions décrit exactement step : simulable par environments.vector_env
+    vectorizable = True
+
     def __init__(self, length=5):
         self.length = length
         self.states = list(range(length))
@@ -26,6 +29,10 @@ class LineWorldEnv:
         self.agent_pos = next_state
         return next_state, reward
 
+    def step_transition(self, action):
+        next_state, reward = self.step(action)
+        return next_state, reward, next_state in self.terminal_states
+
     def get_state(self):
         return self.agent_pos
 
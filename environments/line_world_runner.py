@@ -4,7 +4,7 @@ from Utils.export_results_to_xlsx import export_results
 from Utils.save_load_policy import save_policy, load_policy
 from agents.dynamic_programming import policy_iteration, value_iteration
 from agents.planning_methods import dyna_q, dyna_q_plus
-from agents.temporal_difference_methods import sarsa, expected_sarsa, q_learning
+from agents.temporal_difference_methods import sarsa, expected_sarsa, q_learning, extract_deterministic_policy
 from agents.monte_carlo_methods import (
     on_policy_first_visit_mc_control,
     monte_carlo_es,
@@ -86,6 +86,10 @@ class LineWorldRunner:
 
             try:
                 self.policy, _ = agent_func(self.env, **hyperparams)
+                if not isinstance(self.policy, dict):
+                    # GreedyPolicy / TabularPolicy : get(s) donne l'action de l'état ; une matrice π passe par argmax
+                    pi = self.policy if hasattr(self.policy, "get") else extract_deterministic_policy(self.policy)
+                    self.policy = {s: pi.get(s) for s in range(len(pi))}
             except Exception as e:
                 print(f"Erreur lors de l'exécution de l'agent {self.agent_name} : {e}")
                 return
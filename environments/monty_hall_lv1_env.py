@@ -91,6 +91,10 @@ class MontyHallEnv:
         self._score += reward
         return self.agent_state, reward
 
+    def step_transition(self, action):
+        next_state, reward = self.step(action)
+        return self.state_to_index[next_state], reward, next_state[0] == "done"
+
     def get_state(self):
         return self.state_to_index[self.agent_state]
 
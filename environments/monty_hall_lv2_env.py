@@ -104,6 +104,10 @@ class MontyHallEnvLv2:
         self._score += reward
         return next_state, reward
 
+    def step_transition(self, action):
+        next_state, reward = self.step(action)
+        return self.state_to_index[next_state], reward, next_state[0] == "done"
+
     def get_state(self):
         return self.state_to_index[self.agent_state]
 
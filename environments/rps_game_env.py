@@ -97,6 +97,10 @@ class RPSGameEnv:
         self._score += reward
         return next_state, reward
 
+    def step_transition(self, action):
+        next_state, reward = self.step(action)
+        return self.state_to_index[next_state], reward, next_state == "TERMINAL"
+
     def get_state(self):
         return self.state_to_index[self.state]
 
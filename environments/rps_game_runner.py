@@ -169,6 +169,9 @@ def rps_game(agent_name="Joueur Humain"):
             print("Souhaitez-vous sauvegarder cette politique ? (O/N)")
             if input().strip().lower() == "o":
                 save_policy(policy, filename)
+        # GreedyPolicy / TabularPolicy : la matrice π (np.asarray) passe par la branche ndarray
+        if not isinstance(policy, (dict, np.ndarray)):
+            policy = np.asarray(policy)
         agent_mode = True
     else:
         policy = None
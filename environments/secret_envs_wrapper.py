@@ -28,7 +28,7 @@ class SecretEnv0Wrapper:
         self.lib.secret_env_0_num_rewards.argtypes = []
         self.lib.secret_env_0_num_rewards.restype = ctypes.c_size_t
 
-        self.lib.secret_env_0_reward.argtypes = []
+        self.lib.secret_env_0_reward.argtypes = [ctypes.c_size_t]
         self.lib.secret_env_0_reward.restype = ctypes.c_float
 
         self.lib.secret_env_0_transition_probability.argtypes = [ctypes.c_size_t, ctypes.c_size_t, ctypes.c_size_t,
@@ -165,7 +165,7 @@ class SecretEnv1Wrapper:
         self.lib.secret_env_1_num_rewards.argtypes = []
         self.lib.secret_env_1_num_rewards.restype = ctypes.c_size_t
 
-        self.lib.secret_env_1_reward.argtypes = []
+        self.lib.secret_env_1_reward.argtypes = [ctypes.c_size_t]
         self.lib.secret_env_1_reward.restype = ctypes.c_float
 
         self.lib.secret_env_1_transition_probability.argtypes = [ctypes.c_size_t, ctypes.c_size_t, ctypes.c_size_t,
@@ -302,7 +302,7 @@ class SecretEnv2Wrapper:
         self.lib.secret_env_2_num_rewards.argtypes = []
         self.lib.secret_env_2_num_rewards.restype = ctypes.c_size_t
 
-        self.lib.secret_env_2_reward.argtypes = []
+        self.lib.secret_env_2_reward.argtypes = [ctypes.c_size_t]
         self.lib.secret_env_2_reward.restype = ctypes.c_float
 
         self.lib.secret_env_2_transition_probability.argtypes = [ctypes.c_size_t, ctypes.c_size_t, ctypes.c_size_t,
@@ -439,7 +439,7 @@ class SecretEnv3Wrapper:
         self.lib.secret_env_3_num_rewards.argtypes = []
         self.lib.secret_env_3_num_rewards.restype = ctypes.c_size_t
 
-        self.lib.secret_env_3_reward.argtypes = []
+        self.lib.secret_env_3_reward.argtypes = [ctypes.c_size_t]
         self.lib.secret_env_3_reward.restype = ctypes.c_float
 
         self.lib.secret_env_3_transition_probability.argtypes = [ctypes.c_size_t, ctypes.c_size_t, ctypes.c_size_t,
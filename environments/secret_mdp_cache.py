@@ -0,0 +1,190 @@
+import hashlib
+import os
+import warnings
+from collections import defaultdict
+from multiprocessing import Pool
+
+import numpy as np
+
+from agents.mdp_model import CSRMatrix, SparseMDP, build_model
+from environments import secret_envs_wrapper
+from environments.step_protocol import as_step_env
+
+__all__ = ["library_hash", "extract_secret_mdp", "load_secret_mdp"]
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mdp_cache")
+_CACHE_FILES = ("indptr", "indices", "data", "R", "mask", "terminal", "covered")
+# Exploration par défaut avant lecture de p() (voir extract_secret_mdp)
+EXPLORATION_ROLLOUTS = 2000
+EXPLORATION_MAX_STEPS = 1000
+# Écart toléré sur la somme des p(s, a, ., .) des successeurs observés (p() renvoie des float32)
+PROBABILITY_TOLERANCE = 1e-4
+
+# Modèles déjà chargés dans ce processus
+_loaded_models = {}
+_worker_env = None
+
+
+def library_hash(lib_path=None):
+    lib_path = secret_envs_wrapper.lib_path if lib_path is None else lib_path
+    sha = hashlib.sha256()
+    with open(lib_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()[:16]
+
+
+def _init_worker(env_cls):
+    global _worker_env
+    _worker_env = env_cls()
+
+
+def _scan_pairs(pairs):
+    # Interroge p(s, a, s', r) sur tous les s' et r pour un bloc de couples (s, a) ; garde les probabilités non nulles
+    env = _worker_env
+    p = env.p
+    num_states, num_rewards = env.num_states(), env.num_rewards()
+    rows = []
+    for s, a in pairs:
+        for s_p in range(num_states):
+            for r in range(num_rewards):
+                prob = p(s, a, s_p, r)
+                if prob > 0.0:
+                    rows.append((s, a, s_p, r, prob))
+    return rows
+
+
+def _explore(env, rewards, rollouts, max_steps):
+    # Parties jouées en choisissant l'action la moins essayée de chaque état : successeurs observés
+    # {(s, a): {(s', indice de récompense)}}, actions disponibles des états d'où l'on a joué, états terminaux.
+    # Les départs alternent reset() et from_random_state() quand l'environnement le permet.
+    from_random_state = getattr(type(env), "from_random_state", None)
+    candidates = defaultdict(set)
+    tries = defaultdict(int)
+    available, terminal = {}, set()
+    for i in range(rollouts):
+        if from_random_state is not None and i % 2:
+            episode_env = as_step_env(from_random_state())
+        else:
+            episode_env = as_step_env(env)
+            episode_env.reset()
+        s = episode_env.state_id()
+        for _ in range(max_steps):
+            if episode_env.is_game_over():
+                terminal.add(s)
+                break
+            actions = episode_env.available_actions()
+            if len(actions) == 0:
+                break
+            available[s] = actions
+            counts = [tries[(s, int(a))] for a in actions]
+            a = int(actions[int(np.argmin(counts))])
+            tries[(s, a)] += 1
+            s_p, reward, _ = episode_env.step_transition(a)
+            candidates[(s, a)].add((s_p, int(np.argmin(np.abs(rewards - reward)))))
+            s = s_p
+    return candidates, available, terminal
+
+
+def _cache_path(env_cls, cache_dir, lib_hash, rollouts, max_steps, scan_unreached):
+    # Le modèle dépend de la bibliothèque et des réglages d'exploration : chacun a son propre répertoire
+    suffix = "-complet" if scan_unreached else ""
+    return os.path.join(cache_dir, f"{env_cls.__name__}-{lib_hash}-{rollouts}x{max_steps}{suffix}")
+
+
+def extract_secret_mdp(env_cls, workers=None, cache_dir=CACHE_DIR, chunk_size=16, rollouts=EXPLORATION_ROLLOUTS,
+                       max_steps=EXPLORATION_MAX_STEPS, scan_unreached=False):
+    # Construit le modèle creux d'un SecretEnv à partir de p() et l'écrit en .npy dans le cache, indexé par le
+    # hash de la bibliothèque et les réglages d'exploration. Les successeurs sont d'abord observés en jouant
+    # (_explore) : p() n'est lu que sur ces candidats, et un couple (s, a) n'est balayé sur tous les (s', r)
+    # (en parallèle) que si la masse des candidats n'atteint pas 1.
+    # Couverture partielle : un état que ni les parties ni ces balayages n'atteignent reste sans transition,
+    # donc terminal avec V = 0. Le tableau covered (mis en cache) marque les états décrits ; load_secret_mdp
+    # avertit s'il en manque. scan_unreached=True balaie aussi ces états dans p() (S * A * S * R appels pour
+    # les états manquants) et rend le modèle exact.
+    env = env_cls()
+    num_states, num_actions, num_rewards = env.num_states(), env.num_actions(), env.num_rewards()
+    rewards = np.array([env.reward(i) for i in range(num_rewards)], dtype=np.float64)
+
+    candidates, available, terminal = _explore(env, rewards, rollouts, max_steps)
+    rows, to_scan = [], []
+    for s, actions in available.items():
+        for a in map(int, actions):
+            found = [(s, a, s_p, r, env.p(s, a, s_p, r)) for s_p, r in candidates.get((s, a), ())]
+            found = [row for row in found if row[4] > 0.0]
+            if sum(row[4] for row in found) >= 1.0 - PROBABILITY_TOLERANCE:
+                rows.extend(found)
+            else:
+                to_scan.append((s, a))
+    known = set(available) | terminal
+    reached = {s_p for succ in candidates.values() for s_p, _ in succ} - known
+    if scan_unreached:
+        reached = set(range(num_states)) - known
+    to_scan += [(s, a) for s in sorted(reached) for a in range(num_actions)]
+    scanned = {s for s, _ in to_scan}
+
+    if to_scan:
+        with Pool(processes=workers, initializer=_init_worker, initargs=(env_cls,)) as pool:
+            # Les balayages complets peuvent révéler de nouveaux états, balayés à leur tour
+            while to_scan:
+                chunks = [to_scan[i:i + chunk_size] for i in range(0, len(to_scan), chunk_size)]
+                new_rows = [row for part in pool.imap(_scan_pairs, chunks) for row in part]
+                rows.extend(new_rows)
+                new_states = {row[2] for row in new_rows} - known - scanned
+                scanned |= new_states
+                to_scan = [(s, a) for s in sorted(new_states) for a in range(num_actions)]
+
+    coo = np.array(rows, dtype=np.float64).reshape(-1, 5)
+    s, a, s_p, r = (coo[:, i].astype(np.int64) for i in range(4))
+    prob = coo[:, 4]
+
+    # Fusion des récompenses : une entrée par (s, a, s'), R[s, a] = somme des p * r
+    key = (s * num_actions + a) * num_states + s_p
+    unique_keys, inverse = np.unique(key, return_inverse=True)
+    merged_prob = np.bincount(inverse, weights=prob)
+    merged_reward = np.bincount(inverse, weights=prob * rewards[r]) / np.where(merged_prob > 0, merged_prob, 1.0)
+    row, next_states = np.divmod(unique_keys, num_states)
+    rows_s, rows_a = np.divmod(row, num_actions)
+
+    mask = np.zeros((num_states, num_actions), dtype=bool)
+    mask[rows_s, rows_a] = True
+    terminal = ~mask.any(axis=1)
+    covered = np.zeros(num_states, dtype=bool)
+    covered[list(known | scanned)] = True
+
+    model = build_model(list(range(num_states)), list(range(num_actions)),
+                        (rows_s, rows_a, merged_prob, next_states, merged_reward), mask, terminal, sparse=True)
+
+    path = _cache_path(env_cls, cache_dir, library_hash(), rollouts, max_steps, scan_unreached)
+    os.makedirs(path, exist_ok=True)
+    arrays = {"indptr": model.P.indptr, "indices": model.P.indices, "data": model.P.data,
+              "R": model.R, "mask": model.mask, "terminal": model.terminal, "covered": covered}
+    for name in _CACHE_FILES:
+        np.save(os.path.join(path, f"{name}.npy"), arrays[name])
+    return model
+
+
+def load_secret_mdp(env, workers=None, cache_dir=CACHE_DIR, rollouts=EXPLORATION_ROLLOUTS,
+                    max_steps=EXPLORATION_MAX_STEPS, scan_unreached=False):
+    # Accepte une classe SecretEnvX ou une instance ; extrait le modèle au premier appel seulement (par
+    # réglages d'exploration). Avertit si des états n'ont pas été décrits (voir extract_secret_mdp).
+    env_cls = env if isinstance(env, type) else type(env)
+    path = _cache_path(env_cls, cache_dir, library_hash(), rollouts, max_steps, scan_unreached)
+    if path in _loaded_models:
+        return _loaded_models[path]
+
+    if not all(os.path.exists(os.path.join(path, f"{name}.npy")) for name in _CACHE_FILES):
+        extract_secret_mdp(env_cls, workers, cache_dir, rollouts=rollouts, max_steps=max_steps,
+                           scan_unreached=scan_unreached)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _CACHE_FILES}
+    num_states, num_actions = arrays["R"].shape
+    P = CSRMatrix(arrays["indptr"], arrays["indices"], arrays["data"], (num_states * num_actions, num_states))
+    model = SparseMDP(list(range(num_states)), list(range(num_actions)), P,
+                      arrays["R"], arrays["mask"], arrays["terminal"])
+
+    missing = num_states - int(np.count_nonzero(arrays["covered"]))
+    if missing:
+        warnings.warn(f"{env_cls.__name__} : {missing} états sur {num_states} jamais atteints par l'exploration, "
+                      f"sans transition dans le modèle (terminaux, V = 0) ; scan_unreached=True les lit dans p()")
+    _loaded_models[path] = model
+    return model
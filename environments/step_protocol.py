@@ -0,0 +1,55 @@
+__all__ = ["ScoreDiffStepAdapter", "as_step_env"]
+
+# Protocole de pas des agents : env.step_transition(action) renvoie (indice d'état, récompense, terminé) en un
+# seul appel, au lieu de step puis score (deux fois), get_state / state_id et is_game_over.
+# Les environnements du dépôt (LineWorld, GridWorld, Monty Hall 1 et 2, RPS) l'implémentent directement ;
+# les autres (SecretEnvX) passent par l'adaptateur.
+
+
+class ScoreDiffStepAdapter:
+    # step_transition pour un environnement qui n'expose que step / score / state_id (get_state, state) /
+    # is_game_over : la récompense est la différence avec le score gardé en cache depuis le pas précédent
+    # (ou le reset).
+    # Les autres attributs sont ceux de l'environnement enveloppé.
+    def __init__(self, env):
+        self.env = env
+        if hasattr(env, "state_id"):
+            self._state = env.state_id
+        elif hasattr(env, "get_state"):
+            self._state = env.get_state
+        else:
+            self._state = env.state
+        self._score = env.score()
+
+    def __getattr__(self, name):
+        if name == "env":
+            raise AttributeError(name)
+        attr = getattr(self.env, name)
+        if name == "reset_to":
+            # Repositionnement (départs explorateurs) : le score de référence est relu comme après reset
+            def reset_to(*args):
+                result = attr(*args)
+                self._score = self.env.score()
+                return result
+            return reset_to
+        return attr
+
+    def reset(self, *args):
+        result = self.env.reset(*args)
+        self._score = self.env.score()
+        return result
+
+    def step_transition(self, action):
+        env = self.env
+        env.step(action)
+        score = env.score()
+        reward = score - self._score
+        self._score = score
+        return self._state(), reward, env.is_game_over()
+
+
+def as_step_env(env):
+    # env lui-même s'il implémente le protocole, sinon enveloppé dans ScoreDiffStepAdapter
+    if callable(getattr(env, "step_transition", None)):
+        return env
+    return ScoreDiffStepAdapter(env)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from agents.mdp_model import compile_model
+from agents.random_stream import GLOBAL_STREAM
+
+__all__ = ["TabularVectorEnv", "make_vector_env"]
+
+
+class TabularVectorEnv:
+    # N copies d'un environnement simulées en tableaux à partir de son modèle compilé.
+    # Les états sont exposés dans la numérotation de env.get_state() ; la récompense d'un pas est R[s, a].
+    # rng : RandomStream de l'agent pour le tirage des transitions, générateur global sinon
+    def __init__(self, env, num_envs, rng=None):
+        model = compile_model(env, sparse=True)
+        self.num_envs = num_envs
+        self.rng = rng or GLOBAL_STREAM
+        self.num_actions = model.num_actions
+        P = model.P
+        self._indptr, self._next_states = P.indptr, P.indices
+        # CDF globale décalée par ligne : la ligne k occupe ]k, k + 1], d'où un seul searchsorted par pas
+        cumulative = np.cumsum(P.data)
+        row_start = np.concatenate(([0.0], cumulative))[P.indptr[:-1]]
+        self._global_cdf = P.row_ids + (cumulative - np.repeat(row_start, np.diff(P.indptr)))
+        self._R = model.R.ravel()
+        self._terminal = model.terminal
+
+        # Correspondance indices du modèle <-> indices de l'environnement
+        state_to_index = getattr(env, "state_to_index", None)
+        self._to_env = np.array([state_to_index[s] if state_to_index is not None else s for s in model.states])
+        self._to_model = np.full(self._to_env.max() + 1, -1)
+        self._to_model[self._to_env] = np.arange(len(model.states))
+
+        self._action_to_model = np.full(max(model.actions) + 1, -1)
+        self._action_to_model[model.actions] = np.arange(len(model.actions))
+
+        env.reset()
+        self._start = self._to_model[env.get_state()]
+        self.states = np.full(num_envs, self._start)
+
+    def reset(self, slots=None):
+        # Remet les emplacements slots (tous par défaut) dans l'état initial ; renvoie leurs états
+        slots = np.arange(self.num_envs) if slots is None else slots
+        self.states[slots] = self._start
+        return self._to_env[self.states[slots]]
+
+    def step(self, slots, actions):
+        # Un pas pour chaque emplacement de slots (actions valides) : (états suivants, récompenses, terminés)
+        rows = self.states[slots] * self.num_actions + self._action_to_model[actions]
+        u = self.rng.random(len(rows))
+        k = np.searchsorted(self._global_cdf, rows + u, side="right")
+        k = np.minimum(k, self._indptr[rows + 1] - 1)  # garde-fou contre l'arrondi de la CDF
+        next_states = self._next_states[k]
+        self.states[slots] = next_states
+        return self._to_env[next_states], self._R[rows], self._terminal[next_states]
+
+
+def make_vector_env(env, num_envs, rng=None):
+    # None si l'environnement ne décrit pas exactement sa dynamique par get_transitions (ex. Monty Hall,
+    # dont la bonne porte est tirée à chaque reset) : les agents gardent alors la boucle mono-environnement
+    if not getattr(env, "vectorizable", False):
+        return None
+    return TabularVectorEnv(env, num_envs, rng)
@@ -5,7 +5,9 @@ from tqdm import tqdm
 from itertools import product
 
 # === Import des agents ===
-from agents.dynamic_programming import policy_iteration, value_iteration
+from agents.dynamic_programming import policy_iteration, value_iteration, modified_policy_iteration, \
+    batched_value_iteration
+from agents.convergence_log import ConvergenceLog
 
 # === Import des environnements ===
 from environments.line_world_env import LineWorldEnv
@@ -17,7 +19,8 @@ from environments.rps_game_env import RPSGameEnv
 # === Configuration ===
 AGENTS = {
     "policy_iteration": policy_iteration,
-    "value_iteration": value_iteration
+    "value_iteration": value_iteration,
+    "modified_policy_iteration": modified_policy_iteration
 }
 
 ENVIRONMENTS = {
@@ -34,6 +37,22 @@ THETAS = [0.0001, 0.00001]
 
 OUTPUT_DIR = "../Reports"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Journaux de convergence (un .npy par exécution), relus par Utils/DP_visualisation.py
+CONVERGENCE_DIR = os.path.join(OUTPUT_DIR, "dp_convergence")
+os.makedirs(CONVERGENCE_DIR, exist_ok=True)
+
+
+# Modes de balayage comparés sur les grands environnements (nombre de balayages jusqu'à theta)
+SWEEP_MODES = [
+    ("jacobi", "index"),
+    ("gauss_seidel", "index"),
+    ("gauss_seidel", "reverse_bfs"),
+    ("gauss_seidel", "residual"),
+]
+LARGE_ENVIRONMENTS = {
+    "line_world_200": lambda: LineWorldEnv(200),
+    "grid_world_40x40": lambda: GridWorldEnv(40, 40),
+}
 
 
 # Evaluation de la politique
@@ -44,7 +63,7 @@ def evaluate_policy(env, policy):
         state = env.get_state()
         total, step = 0, 0
         while not env.is_game_over() and step < 100:
-            action = policy.get(state, 0) if isinstance(policy, dict) else int(policy[state].argmax())
+            action = policy.get(state, 0) if hasattr(policy, "get") else int(policy[state].argmax())
             if action is None:
                 break  # sécurité supplémentaire
             env.step(action)
@@ -62,14 +81,36 @@ def run_all_agents_all_envs():
     for agent_name, agent_func in AGENTS.items():
         print(f"\nTest de l'agent : {agent_name}")
         for env_name, EnvCls in tqdm(ENVIRONMENTS.items(), desc="Environnements"):
+            batched = None
+            if agent_name == "value_iteration":
+                # Toute la grille (gamma, theta) en une seule résolution ; temps réparti par combinaison
+                try:
+                    batch_logs = {gamma: ConvergenceLog() for gamma in GAMMAS}
+                    start = time.time()
+                    batched = batched_value_iteration(EnvCls(), GAMMAS, THETAS, callbacks=batch_logs)
+                    batch_time = (time.time() - start) / len(batched)
+                except Exception as e:
+                    print(f"Résolution groupée impossible sur {env_name} : {e}")
+
             for gamma, theta in product(GAMMAS, THETAS):
                 try:
                     env = EnvCls()
                     print(f"{agent_name} sur {env_name} | gamma={gamma}, theta={theta}")
 
                     start = time.time()
-                    policy, _ = agent_func(env, gamma=gamma, theta=theta)
-                    elapsed = round(time.time() - start, 2)
+                    if batched is not None:
+                        policy, _ = batched[(gamma, theta)]
+                        elapsed = round(batch_time, 2)
+                        sweeps = batch_logs[gamma].sweeps_to(theta)
+                        log = batch_logs[gamma].head(sweeps or len(batch_logs[gamma]))
+                    else:
+                        log = ConvergenceLog()
+                        policy, _ = agent_func(env, gamma=gamma, theta=theta, callback=log)
+                        elapsed = round(time.time() - start, 2)
+                        sweeps = len(log)
+
+                    log_path = os.path.join(CONVERGENCE_DIR, f"{agent_name}_{env_name}_g{gamma}_t{theta}.npy")
+                    log.save(log_path)
 
                     mean_score, all_scores, mean_steps = evaluate_policy(env, policy)
                     std_score = pd.Series(all_scores).std()
@@ -83,6 +124,8 @@ def run_all_agents_all_envs():
                         "std_score": std_score,
                         "mean_steps": mean_steps,
                         "time": elapsed,
+                        "sweeps": sweeps,
+                        "convergence_log": log_path,
                     })
 
                 except Exception as e:
@@ -106,8 +149,33 @@ def run_all_agents_all_envs():
     print(f"\nRésultats sauvegardés dans : {output_path}")
 
 
+def compare_sweep_modes(gamma=0.99, theta=1e-5):
+    results = []
+    for (env_name, make_env), agent_name in product(LARGE_ENVIRONMENTS.items(), ["value_iteration",
+                                                                              "policy_iteration"]):
+        for sweep, ordering in SWEEP_MODES:
+            log = ConvergenceLog()
+            start = time.time()
+            AGENTS[agent_name](make_env(), gamma=gamma, theta=theta, callback=log, sweep=sweep, ordering=ordering)
+            results.append({
+                "agent": agent_name,
+                "env": env_name,
+                "sweep": sweep,
+                "ordering": ordering,
+                "sweeps": len(log),
+                "time": round(time.time() - start, 3),
+            })
+            print(results[-1])
+
+    df = pd.DataFrame(results)
+    output_path = os.path.join(OUTPUT_DIR, "dp_sweep_modes.xlsx")
+    df.to_excel(output_path, index=False)
+    print(f"\nComparaison des balayages sauvegardée dans : {output_path}")
+
+
 if __name__ == "__main__":
     start_time = time.time()
     run_all_agents_all_envs()
+    compare_sweep_modes()
     elapsed_time = round(time.time() - start_time, 2)
     print(f"\nExécution terminée en {elapsed_time} secondes.")
@@ -39,6 +39,10 @@ GAMMAS = [0.3, 0.5, 0.7, 0.9]
 EPSILONS = [0.1, 0.3, 0.5, 0.9]
 MAX_STEPS = [100]
 EPISODES = [500]
+# Processus de génération d'épisodes (mode parallèle des agents MC) ; 1 = exécution séquentielle.
+# Au-delà de 1, les épisodes d'un tour sont joués avec la politique figée au dernier échange (tous les
+# sync_every épisodes) : les résultats diffèrent de l'exécution séquentielle, où elle change à chaque épisode.
+WORKERS = 1
 
 
 def evaluate_policy(env, policy, max_steps=100):
@@ -77,7 +81,8 @@ def run_monte_carlo_agents():
                     # Paramètres dynamiques en fonction de l'agent
                     kwargs = {
                         "gamma": gamma,
-                        "episodes": episodes
+                        "episodes": episodes,
+                        "workers": WORKERS
                     }
 
                     if agent_name == "on_policy_mc":
@@ -47,7 +47,7 @@ def evaluate_policy(env, policy):
         state = env.get_state()
         total, step = 0, 0
         while not env.is_game_over() and step < 100:
-            action = policy[state].argmax() if hasattr(policy[state], "argmax") else int(policy.get(state, 0))
+            action = int(policy.get(state, 0)) if hasattr(policy, "get") else policy[state].argmax()
             if action is None:
                 break
             env.step(action)
@@ -6,7 +6,8 @@ from itertools import product
 from tqdm import tqdm
 
 # Imports des agents
-from agents.dynamic_programming import policy_iteration, value_iteration
+from agents.dynamic_programming import policy_iteration, value_iteration, modified_policy_iteration, \
+    batched_value_iteration
 from agents.monte_carlo_methods import (
     on_policy_first_visit_mc_control, monte_carlo_es, off_policy_mc_control
 )
@@ -24,6 +25,7 @@ from environments.rps_game_env import RPSGameEnv
 AGENTS = {
     "policy_iteration": policy_iteration,
     "value_iteration": value_iteration,
+    "modified_policy_iteration": modified_policy_iteration,
     "mc_on_policy": on_policy_first_visit_mc_control,
     "mc_es": monte_carlo_es,
     "mc_off_policy": off_policy_mc_control,
@@ -65,7 +67,7 @@ def evaluate_policy(env, policy):
         state = env.get_state()
         total, step = 0, 0
         while not env.is_game_over() and step < 100:
-            action = policy.get(state, 0) if isinstance(policy, dict) else int(policy[state].argmax())
+            action = policy.get(state, 0) if hasattr(policy, "get") else int(policy[state].argmax())
             env.step(action)
             total += env.score()
             state = env.get_state()
@@ -77,7 +79,7 @@ def evaluate_policy(env, policy):
 
 def get_param_combinations(agent_name):
     keys = []
-    if agent_name in ["policy_iteration", "value_iteration"]:
+    if agent_name in ["policy_iteration", "value_iteration", "modified_policy_iteration"]:
         keys = ["gamma", "theta"]
     elif agent_name in ["mc_on_policy"]:
         keys = ["gamma", "epsilon", "episodes"]
@@ -102,15 +104,28 @@ def run_experiments():
 
         for agent_name, agent_func in tqdm(AGENTS.items(), desc=f"Agents ({env_name})", leave=False):
             keys, param_grid = get_param_combinations(agent_name)
+
+            batched = None
+            if agent_name == "value_iteration":
+                # Toute la grille (gamma, theta) en une seule résolution ; temps réparti par combinaison
+                try:
+                    start_time = time.time()
+                    batched = batched_value_iteration(env, HYPERPARAM_GRID["gamma"], HYPERPARAM_GRID["theta"])
+                    batch_time = (time.time() - start_time) / len(batched)
+                except Exception as e:
+                    print(f"\nRésolution groupée impossible sur {env_name} : {e}")
+
             for param_tuple in tqdm(param_grid, desc=f"{agent_name}", leave=False):
                 params = dict(zip(keys, param_tuple))
                 try:
                     start_time = time.time()
-                    if agent_name in ["policy_iteration", "value_iteration"]:
+                    if batched is not None:
+                        policy, _ = batched[(params["gamma"], params["theta"])]
+                    elif agent_name in ["policy_iteration", "value_iteration", "modified_policy_iteration"]:
                         policy, _ = agent_func(env, **params)
                     else:
                         policy, _, steps = agent_func(env, **params)
-                    elapsed = time.time() - start_time
+                    elapsed = batch_time if batched is not None else time.time() - start_time
                     mean_score, scores, mean_steps = evaluate_policy(env, policy)
                     std_score = pd.Series(scores).std()
 
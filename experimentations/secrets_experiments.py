@@ -5,6 +5,7 @@ import inspect
 import itertools
 
 # Agents
+from agents_for_secret_envs.dynamic_programming import policy_iteration, value_iteration
 from agents_for_secret_envs.monte_carlo_methods import monte_carlo_es, on_policy_first_visit_mc_control, \
     off_policy_mc_control
 from agents_for_secret_envs.planning_methods import dyna_q
@@ -15,6 +16,8 @@ from environments.secret_envs_wrapper import SecretEnv0, SecretEnv1, SecretEnv2,
 
 # Agents & Envs
 AGENTS = {
+    "policy_iteration": policy_iteration,
+    "value_iteration": value_iteration,
     "mc_es": monte_carlo_es,
     "mc_on_policy": on_policy_first_visit_mc_control,
     "mc_off_policy": off_policy_mc_control,
@@ -24,6 +27,11 @@ AGENTS = {
     "dyna_q": dyna_q,
 }
 
+# Agents DP : modèle extrait de p() (environments.secret_mdp_cache), lancés seulement sur les environnements
+# d'au plus DP_MAX_STATES états (les états que les parties n'atteignent pas coûtent S * A * R appels à p())
+DP_AGENTS = {"policy_iteration", "value_iteration"}
+DP_MAX_STATES = 10_000
+
 ENVIRONMENTS = {
     "SecretEnv0": SecretEnv0,
     "SecretEnv1": SecretEnv1,
@@ -71,7 +79,7 @@ def evaluate_policy(env, policy):
         while not env.is_game_over() and step < 1000:
             try:
                 available = list(env.available_actions()) if hasattr(env, "available_actions") else None
-                action = policy.get(state, 0) if isinstance(policy, dict) else int(policy[state].argmax())
+                action = policy.get(state, 0) if hasattr(policy, "get") else int(policy[state].argmax())
                 if available and action not in available:
                     action = available[0]
                 env.step(action)
@@ -95,6 +103,9 @@ def run_experiments():
         env_results = []
 
         for agent_name, agent_func in AGENTS.items():
+            if agent_name in DP_AGENTS and env.num_states() > DP_MAX_STATES:
+                print(f"⏭️ {agent_name} ignoré sur {env_name} : {env.num_states()} états (> {DP_MAX_STATES})")
+                continue
             hyper_grid = list(itertools.product(EPISODES, GAMMAS, ALPHAS, EPSILONS, PLANNING_STEPS, KAPPAS))
 
             for ep, gamma, alpha, epsilon, planning_steps, kappa in hyper_grid:
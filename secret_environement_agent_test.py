@@ -40,7 +40,7 @@ def evaluate_policy(env, policy, max_steps=1000):
     while not env.is_game_over() and steps < max_steps:
         state = env.state_id()
         actions = env.available_actions()
-        if isinstance(policy, dict):
+        if hasattr(policy, "get"):  # dict ou GreedyPolicy
             action = policy.get(state, actions[0])
         else:
             action = policy[state] if state < len(policy) and policy[state] in actions else actions[0]
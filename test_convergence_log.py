@@ -0,0 +1,29 @@
+import time
+
+import numpy as np
+
+from agents.convergence_log import ConvergenceLog
+from agents.dynamic_programming import value_iteration
+from environments.grid_world_env import GridWorldEnv
+
+
+def test_clock_starts_on_first_callback():
+    log = ConvergenceLog()
+    time.sleep(0.2)  # préparation du solveur (construction du modèle, compilation)
+    log("backup", 1.0, 3)
+    time.sleep(0.05)
+    log("backup", 0.5, 1)
+    assert log.records["wall_time"][0] == 0.0
+    assert 0.05 <= log.records["wall_time"][1] < 0.2
+    assert log.setup_time >= 0.2
+    assert log.summary()["setup_time"] == log.setup_time
+    assert log.summary()["solver_time"] < 0.2
+
+
+def test_log_records_every_sweep():
+    log = ConvergenceLog(capacity=1)
+    value_iteration(GridWorldEnv(), 0.9, 1e-8, callback=log)
+    assert len(log) > 1 and log.setup_time is not None
+    assert set(log.records["phase"]) == {2}  # "backup"
+    assert log.sweeps_to(1e-8) == len(log)
+    assert np.all(log.records["wall_time"] >= 0)
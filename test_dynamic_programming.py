@@ -0,0 +1,264 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from agents.dynamic_programming import (backward_induction, batched_value_iteration, evaluate_policy_model,
+                                         modified_policy_iteration, policy_iteration,
+                                         prioritized_sweeping_value_iteration, theta_continuation, value_iteration)
+from agents.mdp_model import DenseMDP, SparseMDP, build_model
+from agents.parallel_dp import SharedMemoryExecutor
+from environments.grid_world_env import GridWorldEnv
+from environments.line_world_env import LineWorldEnv
+
+
+# MDP stochastique aléatoire : trois successeurs par couple (s, a), le dernier état est terminal ;
+# acyclic : successeurs pris parmi les états d'indice supérieur
+def random_model(seed, num_states=8, num_actions=2, sparse=None, acyclic=False):
+    rng = np.random.default_rng(seed)
+    rows_s, rows_a, probs, next_states, rewards = [], [], [], [], []
+    for s in range(num_states - 1):
+        for a in range(num_actions):
+            if acyclic:
+                successors = s + 1 + rng.choice(num_states - s - 1, min(3, num_states - s - 1), replace=False)
+            else:
+                successors = rng.choice(num_states, 3, replace=False)
+            for s_p, p in zip(successors, rng.dirichlet(np.ones(len(successors)))):
+                rows_s.append(s)
+                rows_a.append(a)
+                probs.append(p)
+                next_states.append(s_p)
+                rewards.append(rng.normal())
+    terminal = np.zeros(num_states, dtype=bool)
+    terminal[-1] = True
+    mask = np.ones((num_states, num_actions), dtype=bool)
+    mask[-1] = False
+    transitions = tuple(np.array(x) for x in (rows_s, rows_a, probs, next_states, rewards))
+    return build_model(list(range(num_states)), list(range(num_actions)), transitions, mask, terminal, sparse)
+
+
+# Référence : meilleure valeur parmi toutes les politiques déterministes, chacune résolue exactement
+def optimal_values(model, gamma):
+    P, R = model.P, model.R
+    if not isinstance(model, DenseMDP):
+        dense = np.zeros((model.num_states * model.num_actions, model.num_states))
+        for row in range(dense.shape[0]):
+            start, end = model.P.indptr[row], model.P.indptr[row + 1]
+            np.add.at(dense[row], model.P.indices[start:end], model.P.data[start:end])
+        P = dense.reshape(model.num_states, model.num_actions, model.num_states)
+    states = np.flatnonzero(~model.terminal)
+    best = np.full(model.num_states, -np.inf)
+    for actions in product(range(model.num_actions), repeat=len(states)):
+        P_pi, R_pi = np.zeros((model.num_states, model.num_states)), np.zeros(model.num_states)
+        P_pi[states], R_pi[states] = P[states, actions], R[states, actions]
+        best = np.maximum(best, np.linalg.solve(np.eye(model.num_states) - gamma * P_pi, R_pi))
+    return best
+
+
+def as_array(values):
+    return np.array([values[s] for s in sorted(values)])
+
+
+def assert_optimal(model, result, gamma, atol=1e-6):
+    # result : (politique, valeurs) au format dict des solveurs ; la politique doit être gloutonne pour V*
+    policy, V = result[:2]
+    V_star = optimal_values(model, gamma)
+    assert np.allclose(as_array(V), V_star, atol=atol)
+    Q_star = model.q_values(V_star, gamma)
+    for s, a in policy.items():
+        if a is not None:
+            assert Q_star[s, a] >= np.max(Q_star[s]) - atol
+
+
+def count_sweeps(model, policy, ordering):
+    calls = []
+    V = evaluate_policy_model(model, policy, 0.9, 1e-8, evaluation="iterative", callback=lambda *x: calls.append(x),
+                              sweep="gauss_seidel", ordering=ordering)
+    return len(calls), V
+
+
+def test_residual_ordering_uses_previous_sweep():
+    model = random_model(0)
+    policy = np.zeros(model.num_states, dtype=int)
+    index_sweeps, V_index = count_sweeps(model, policy, "index")
+    residual_sweeps, V_residual = count_sweeps(model, policy, "residual")
+    V_direct = evaluate_policy_model(model, policy, 0.9, 1e-8, evaluation="direct")
+
+    # Avec des résidus toujours nuls, l'ordre "residual" retombait sur l'ordre des indices
+    assert residual_sweeps != index_sweeps
+    assert np.allclose(V_index, V_direct, atol=1e-6)
+    assert np.allclose(V_residual, V_direct, atol=1e-6)
+
+
+def test_dense_backend_matches_reference():
+    for seed in range(3):
+        model = random_model(seed)
+        assert isinstance(model, DenseMDP)
+        assert_optimal(model, policy_iteration(model, 0.9, 1e-10), 0.9)
+        assert_optimal(model, value_iteration(model, 0.9, 1e-10), 0.9)
+
+
+def test_dense_backend_matches_python_backend():
+    for solver in (policy_iteration, value_iteration):
+        policy, V = solver(GridWorldEnv(), 0.9, 1e-10, backend="dense")
+        policy_python, V_python = solver(GridWorldEnv(), 0.9, 1e-10, backend="python")
+        assert V.keys() == V_python.keys()
+        assert np.allclose([V[s] for s in V], [V_python[s] for s in V], atol=1e-6)
+        assert all(policy[s] == policy_python.get(s) for s in policy if policy[s] is not None)
+
+
+def test_sparse_backend_matches_dense_backend():
+    for seed in range(3):
+        dense, sparse = random_model(seed, sparse=False), random_model(seed, sparse=True)
+        assert isinstance(sparse, SparseMDP)
+        V = np.random.default_rng(seed).normal(size=dense.num_states)
+        assert np.allclose(sparse.q_values(V, 0.9), dense.q_values(V, 0.9))
+        assert_optimal(sparse, policy_iteration(sparse, 0.9, 1e-10), 0.9)
+        assert_optimal(sparse, value_iteration(sparse, 0.9, 1e-10), 0.9)
+    for solver in (policy_iteration, value_iteration):
+        _, V_sparse = solver(GridWorldEnv(), 0.9, 1e-10, backend="sparse")
+        _, V_dense = solver(GridWorldEnv(), 0.9, 1e-10, backend="dense")
+        assert np.allclose(as_array(V_sparse), as_array(V_dense), atol=1e-8)
+
+
+def test_policy_evaluation_modes_match_reference():
+    for sparse in (False, True):
+        model = random_model(4, sparse=sparse)
+        policy = np.array([1, 0, 1, 1, 0, 0, 1, 0])
+        V_iterative = evaluate_policy_model(model, policy, 0.9, 1e-12, evaluation="iterative")
+        for evaluation in ("direct", "krylov", "auto"):
+            V = evaluate_policy_model(model, policy, 0.9, 1e-12, evaluation=evaluation)
+            assert np.allclose(V, V_iterative, atol=1e-8)
+            assert_optimal(model, policy_iteration(model, 0.9, 1e-10, evaluation=evaluation), 0.9)
+
+
+def test_modified_policy_iteration_matches_reference():
+    model = random_model(5)
+    sweeps = {}
+    for k in (1, 5, "adaptive"):
+        calls = []
+        result = modified_policy_iteration(model, 0.9, 1e-10, k=k, callback=lambda *x: calls.append(x))
+        assert_optimal(model, result, 0.9)
+        sweeps[k] = sum(phase == "backup" for phase, *_ in calls)
+    # Plus d'évaluation par amélioration : moins de mises à jour gloutonnes
+    assert sweeps[5] < sweeps[1]
+    with pytest.raises(ValueError):
+        modified_policy_iteration(model, k=0)
+
+
+def test_prioritized_sweeping_matches_reference():
+    for seed in range(3):
+        model = random_model(seed)
+        assert_optimal(model, prioritized_sweeping_value_iteration(model, 0.9, 1e-12), 0.9)
+
+    # Sur un modèle plus grand : mêmes valeurs que value_iteration avec moins de mises à jour d'état
+    model = random_model(0, num_states=30, num_actions=3)
+    _, V, backups = prioritized_sweeping_value_iteration(model, 0.9, 1e-10)
+    calls = []
+    _, V_sweeps = value_iteration(model, 0.9, 1e-10, callback=lambda *x: calls.append(x))
+    assert np.allclose(as_array(V), as_array(V_sweeps), atol=1e-8)
+    assert backups < len(calls) * model.num_states
+
+
+def test_backward_induction_matches_reference():
+    for seed in range(3):
+        model = random_model(seed, acyclic=True)
+        assert model.is_acyclic()
+        calls = []
+        result = backward_induction(model, 0.9, callback=lambda *x: calls.append(x))
+        # Une seule passe, exacte ; gamma = 1 est admis sur un horizon fini
+        assert len(calls) == 1
+        assert_optimal(model, result, 0.9, atol=1e-12)
+        assert_optimal(model, backward_induction(model, 1.0), 1.0, atol=1e-12)
+
+    # MDP avec cycles : repli sur value_iteration
+    model = random_model(0)
+    assert not model.is_acyclic()
+    assert_optimal(model, backward_induction(model, 0.9, 1e-10), 0.9)
+
+
+def test_batched_value_iteration_matches_single_solves():
+    model = random_model(6)
+    gammas, thetas = [0.5, 0.9, 0.95], [1e-4, 1e-10]
+    results = batched_value_iteration(model, gammas, thetas)
+    assert set(results) == set(product(gammas, thetas))
+    for gamma, theta in product(gammas, thetas):
+        policy, V = results[(gamma, theta)]
+        # Capturé au balayage où value_iteration s'arrête : même résultat (aux arrondis du produit groupé près)
+        policy_single, V_single = value_iteration(model, gamma, theta)
+        assert policy == policy_single
+        assert np.allclose(as_array(V), as_array(V_single), rtol=0.0, atol=1e-12)
+    for gamma in gammas:
+        assert_optimal(model, results[(gamma, 1e-10)], gamma)
+
+
+def test_theta_continuation_and_warm_starts_match_reference():
+    model = random_model(7)
+    for solver in (value_iteration, policy_iteration, modified_policy_iteration):
+        history = theta_continuation(solver, model, [1e-2, 1e-6, 1e-10], gamma=0.9)
+        assert [step["theta"] for step in history] == [1e-2, 1e-6, 1e-10]
+        assert_optimal(model, (history[-1]["policy"], history[-1]["V"]), 0.9)
+
+    # Démarrage depuis la solution : un seul balayage (value_iteration) ou une seule amélioration (policy_iteration)
+    policy, V = value_iteration(model, 0.9, 1e-12)
+    calls = []
+    assert_optimal(model, value_iteration(model, 0.9, 1e-10, initial_V=V, callback=lambda *x: calls.append(x)), 0.9)
+    assert len(calls) == 1
+    calls = []
+    policy_iteration(model, 0.9, 1e-10, initial_policy=policy, callback=lambda *x: calls.append(x))
+    assert [phase for phase, *_ in calls].count("improvement") == 1
+
+
+def test_action_elimination_and_span_stopping_match_reference():
+    for seed in range(3):
+        model = random_model(seed, num_actions=3)
+        V_star = optimal_values(model, 0.9)
+        for options in ({"eliminate_actions": True}, {"stopping": "span"},
+                        {"eliminate_actions": True, "stopping": "span"}):
+            assert_optimal(model, value_iteration(model, 0.9, 1e-10, **options), 0.9)
+        # Arrêt par semi-norme d'envergure : milieu de l'encadrement à theta / 2 de V*
+        _, V = value_iteration(model, 0.9, 1e-3, stopping="span")
+        assert np.max(np.abs(as_array(V) - V_star)) <= 1e-3 / 2
+    for options in ({"eliminate_actions": True, "sweep": "gauss_seidel"}, {"stopping": "span", "gamma": 1.0},
+                    {"stopping": "max"}):
+        with pytest.raises(ValueError):
+            value_iteration(model, **options)
+
+
+def test_shared_memory_sweeps_match_reference():
+    executor = SharedMemoryExecutor(workers=2, partitions_per_worker=2)
+    for sparse in (False, True):
+        model = random_model(2, sparse=sparse)
+        assert_optimal(model, value_iteration(model, 0.9, 1e-10, executor=executor), 0.9)
+        assert_optimal(model, value_iteration(model, 0.9, 1e-10, executor=executor, stopping="span"), 0.9)
+        assert_optimal(model, policy_iteration(model, 0.9, 1e-10, executor=executor), 0.9)
+    with pytest.raises(ValueError):
+        value_iteration(model, executor=executor, sweep="gauss_seidel")
+
+
+def test_unsupported_backend_options_raise():
+    env = LineWorldEnv()
+    for solver in (modified_policy_iteration, prioritized_sweeping_value_iteration):
+        with pytest.raises(ValueError):
+            solver(env, backend="python")
+    for solver in (policy_iteration, value_iteration):
+        with pytest.raises(ValueError):
+            solver(env, backend="python", callback=lambda *x: None)
+        solver(env, backend="python")
+
+
+if __name__ == "__main__":
+    test_residual_ordering_uses_previous_sweep()
+    test_dense_backend_matches_reference()
+    test_dense_backend_matches_python_backend()
+    test_sparse_backend_matches_dense_backend()
+    test_policy_evaluation_modes_match_reference()
+    test_modified_policy_iteration_matches_reference()
+    test_prioritized_sweeping_matches_reference()
+    test_backward_induction_matches_reference()
+    test_batched_value_iteration_matches_single_solves()
+    test_theta_continuation_and_warm_starts_match_reference()
+    test_action_elimination_and_span_stopping_match_reference()
+    test_shared_memory_sweeps_match_reference()
+    test_unsupported_backend_options_raise()
+    print("OK")
@@ -0,0 +1,59 @@
+import numpy as np
+
+from agents.random_stream import RandomStream
+from agents_for_secret_envs.exploring_starts import StartStatePool
+from environments.grid_world_env import GridWorldEnv
+
+_GRID = GridWorldEnv()
+NON_TERMINAL = {_GRID.state_to_index[state] for state in _GRID.states if not _GRID.is_terminal(state)}
+
+
+class RandomStateGrid:
+    # Sans reset_to (comme SecretEnvX) : from_random_state place l'agent sur une case tirée avec un fort biais
+    # vers les premiers indices
+    draws = np.random.default_rng(0)
+
+    def __init__(self):
+        self.env = GridWorldEnv()
+
+    @classmethod
+    def from_random_state(cls):
+        instance = cls()
+        index = min(int(cls.draws.exponential(4)), instance.env.num_states - 1)
+        instance.env.agent_pos = instance.env.index_to_state[index]
+        return instance
+
+    def state_id(self):
+        return self.env.get_state()
+
+    def is_game_over(self):
+        return self.env.is_game_over()
+
+    def available_actions(self):
+        return np.arange(self.env.num_actions)
+
+
+def draw_starts(pool, n):
+    return [pool.start()[1] for _ in range(n)]
+
+
+def test_reset_to_pool_covers_every_start_state():
+    env = GridWorldEnv()
+    counts = np.bincount(draw_starts(StartStatePool(env, rng=RandomStream(0)), 4600), minlength=env.num_states)
+    assert set(np.flatnonzero(counts)) == NON_TERMINAL
+    # Tirage uniforme sur les états non terminaux : 200 départs attendus par état
+    assert counts[list(NON_TERMINAL)].min() > 140
+
+
+def test_from_random_state_pool_covers_every_start_state():
+    pool = StartStatePool(RandomStateGrid(), initial_draws=2000, refill_draws=2000, rng=RandomStream(0))
+    starts = draw_starts(pool, 2000)
+    assert set(starts) == NON_TERMINAL
+    # Le biais de from_random_state n'est pas reproduit : chaque état garde une part comparable des départs
+    assert np.bincount(starts)[list(NON_TERMINAL)].min() > 40
+
+
+def test_start_states_are_seed_reproducible():
+    first = draw_starts(StartStatePool(GridWorldEnv(), rng=RandomStream(7)), 50)
+    second = draw_starts(StartStatePool(GridWorldEnv(), rng=RandomStream(7)), 50)
+    assert first == second
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from agents import mc_returns
+from agents.mc_returns import discounted_returns, first_visit_indices, incremental_mean_update
+
+
+def returns_loop(rewards, gamma):
+    G, returns = 0.0, []
+    for r in reversed(rewards):
+        G = gamma * G + r
+        returns.append(G)
+    return returns[::-1]
+
+
+@pytest.mark.parametrize("scipy", [True, False])
+def test_discounted_returns_match_python_loop(monkeypatch, scipy):
+    if not scipy:
+        monkeypatch.setattr(mc_returns, "lfilter", None)  # repli NumPy par blocs
+    rng = np.random.default_rng(0)
+    for gamma in (0.0, 0.5, 0.9, 0.99, 1.0):
+        for length in (0, 1, 7, 1000):
+            rewards = rng.normal(size=length)
+            assert np.allclose(discounted_returns(rewards, gamma), returns_loop(rewards, gamma), rtol=1e-10,
+                               atol=1e-10)
+
+
+def test_first_visit_updates_match_python_loop():
+    rng = np.random.default_rng(1)
+    Q, counts = np.zeros((5, 3)), np.zeros((5, 3))
+    Q_loop, counts_loop = np.zeros((5, 3)), np.zeros((5, 3))
+    for _ in range(20):
+        states, actions = rng.integers(5, size=30), rng.integers(3, size=30)
+        G = discounted_returns(rng.normal(size=30), 0.9)
+        first = first_visit_indices(states, actions, 3)
+        incremental_mean_update(Q, counts, states[first], actions[first], G[first])
+
+        visited = set()
+        for t, (s, a) in enumerate(zip(states, actions)):
+            if (s, a) not in visited:
+                visited.add((s, a))
+                counts_loop[s, a] += 1
+                Q_loop[s, a] += (G[t] - Q_loop[s, a]) / counts_loop[s, a]
+    assert np.array_equal(counts, counts_loop)
+    assert np.allclose(Q, Q_loop)
@@ -0,0 +1,50 @@
+import agents.monte_carlo_methods as mc
+from agents.episode_stats import EpisodeStats
+from agents.policies import GreedyPolicy
+from environments.grid_world_env import GridWorldEnv
+
+
+def test_monte_carlo_es_memory_error_returns_greedy_policy(monkeypatch):
+    calls = []
+    first_visit_indices = mc.first_visit_indices
+
+    def failing_first_visit_indices(*args):
+        calls.append(None)
+        if len(calls) > 10:
+            raise MemoryError
+        return first_visit_indices(*args)
+
+    monkeypatch.setattr(mc, "first_visit_indices", failing_first_visit_indices)
+    pi, Q, steps = mc.monte_carlo_es(GridWorldEnv(5, 5), episodes=100, seed=0)
+    assert isinstance(pi, GreedyPolicy)
+    assert isinstance(steps, EpisodeStats) and len(steps) > 10
+    assert all(pi.get(s) == Q[s].argmax() for s in range(len(pi)))
+
+
+def test_step_cap_and_cycles_are_counted_without_printing(capsys):
+    _, _, stats = mc.monte_carlo_es(GridWorldEnv(), episodes=200, max_steps=30, seed=0)
+    assert max(stats) <= 30
+    assert 0 < stats.truncated <= stats.count(30)
+    assert stats.cycles > 0 and stats.cut_cycles == 0
+
+    # stop_cycles : chaque cycle détecté coupe l'épisode avant max_steps
+    _, _, cut = mc.monte_carlo_es(GridWorldEnv(), episodes=200, max_steps=30, stop_cycles=True, seed=0)
+    assert cut.cycles > 0 and cut.cut_cycles == cut.cycles
+    assert cut.summary()["mean_steps"] < stats.summary()["mean_steps"]
+
+    # Comportement uniforme : jamais déterministe, donc aucun cycle compté
+    _, _, behavior = mc.off_policy_mc_control(GridWorldEnv(), episodes=100, max_steps=30, seed=0)
+    assert 0 < behavior.truncated <= behavior.count(30) and behavior.cycles == 0
+    assert capsys.readouterr().out == ""
+
+
+def test_episode_stats_merge():
+    stats = EpisodeStats()
+    stats.record(5, truncated=True)
+    stats.record(3, cycle=True, cut=True)
+    other = EpisodeStats([7])
+    other.truncated = 1
+    stats.merge(other)
+    stats.merge([2])
+    assert list(stats) == [5, 3, 7, 2]
+    assert stats.summary() == {"episodes": 4, "mean_steps": 4.25, "truncated": 2, "cycles": 1, "cut_cycles": 1}
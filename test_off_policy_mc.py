@@ -0,0 +1,152 @@
+import numpy as np
+
+import agents.monte_carlo_methods as mc
+from agents.episode_buffer import EpisodeBuffer
+from agents.importance_sampling import ESTIMATORS, off_policy_update
+from agents.mc_returns import discounted_returns
+from agents.policies import GreedyPolicy
+from environments.grid_world_env import GridWorldEnv
+
+
+# Boucle à rebours d'origine de off_policy_mc_control (échantillonnage préférentiel pondéré, comportement uniforme)
+def reference_update(Q, C, greedy, states, actions, rewards, num_actions, gamma):
+    G = discounted_returns(rewards, gamma)
+    W = 1
+    for t in range(len(states) - 1, -1, -1):
+        s, a = states[t], actions[t]
+        C[s, a] += W
+        Q[s, a] += (W / C[s, a]) * (G[t] - Q[s, a])
+        best_a = np.argmax(Q[s])
+        greedy[s] = best_a
+        if a != best_a:
+            break
+        W *= 1.0 / (np.ones(num_actions) / num_actions)[a]
+
+
+def uniform_episodes(env, count, max_steps, seed):
+    rng = np.random.default_rng(seed)
+    num_actions = env.num_actions
+    episodes = []
+    for _ in range(count):
+        env.reset()
+        episode = EpisodeBuffer()
+        while not env.is_game_over() and len(episode) < max_steps:
+            s = env.get_state()
+            a = int(rng.integers(num_actions))
+            _, r = env.step(a)
+            episode.append(s, a, r)
+        episodes.append(tuple(view.copy() for view in episode.views()))
+    return episodes
+
+
+def test_weighted_update_matches_reference_loop():
+    env = GridWorldEnv(5, 5)
+    num_states, num_actions = env.num_states, env.num_actions
+    gamma = 0.95
+    initial = np.random.default_rng(0).integers(num_actions, size=num_states)
+
+    Q_ref, C_ref, greedy_ref = np.zeros((num_states, num_actions)), np.zeros((num_states, num_actions)), initial.copy()
+    Q = np.zeros((num_states, num_actions))
+    numerators, denominators = np.zeros_like(Q), np.zeros_like(Q)
+    pi = GreedyPolicy(num_states, num_actions, greedy=initial.copy())
+
+    for states, actions, rewards in uniform_episodes(env, 300, 100, seed=1):
+        reference_update(Q_ref, C_ref, greedy_ref, states, actions, rewards, num_actions, gamma)
+        off_policy_update(Q, numerators, denominators, pi, states, actions, rewards,
+                          np.full(len(states), 1.0 / num_actions), gamma)
+
+    assert np.array_equal(Q, Q_ref)
+    assert np.array_equal(denominators, C_ref)
+    assert np.array_equal(pi.greedy, greedy_ref)
+
+
+# Estimateurs par pas, calculés terme à terme : les poids gamma^(k-t) * rapports t+1..k sont multipliés un à un
+# (arrêt dès qu'ils deviennent négligeables, < 1e-30), sans produit sur tout l'épisode
+def reference_estimator(name, rewards, ratios, gamma):
+    T = len(rewards)
+    num, den = np.zeros(T), np.ones(T)
+    for t in range(T):
+        c, discount, G, G_plain, weighted_flat, total, flat = 1.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0
+        for k in range(t, T):
+            if k > t:
+                c *= gamma * ratios[k]
+                discount *= gamma
+            if c < 1e-30 and discount < 1e-30:
+                break
+            flat += rewards[k]
+            horizon = (1.0 - gamma) if k < T - 1 else 1.0
+            G += c * rewards[k]
+            G_plain += discount * rewards[k]
+            weighted_flat += c * horizon * flat
+            total += c * horizon
+        if name in ("ordinary", "weighted"):
+            W = np.prod(ratios[t + 1:])
+            num[t] = W * G_plain
+            if name == "weighted":
+                den[t] = W
+        elif name == "per_decision":
+            num[t] = G
+        else:
+            num[t] = weighted_flat
+            if name == "weighted_discounting_aware":
+                den[t] = total
+    return num, den
+
+
+def test_estimators_stay_finite_on_long_episodes():
+    # gamma * rapport = 0.6 : gamma^k * produit des rapports sous-déborde bien avant 2000 pas
+    rng = np.random.default_rng(2)
+    rewards = rng.normal(size=2000)
+    ratios = np.full(2000, 1.2)
+    ratios[700] = 0.0
+    for name, estimator in ESTIMATORS.items():
+        num, den = estimator(rewards, ratios, 0.5)
+        ref_num, ref_den = reference_estimator(name, rewards, ratios, 0.5)
+        assert np.all(np.isfinite(num)) and np.all(np.isfinite(den)), name
+        assert np.allclose(num, ref_num, rtol=1e-9, atol=1e-9), name
+        assert np.allclose(den, ref_den, rtol=1e-9, atol=1e-9), name
+
+
+class RecordingBehavior:
+    # Politique de comportement ε-greedy enveloppée : relève b(a|s) au moment de chaque tirage
+    def __init__(self, inner):
+        self.inner = inner
+        self.sampled = []
+
+    def sample(self, states, rng=None):
+        actions = self.inner.sample(states, rng)
+        greedy = self.inner.greedy[states]
+        epsilon = self.inner.epsilon[states]
+        self.sampled.append(epsilon / self.inner.num_actions + (1.0 - epsilon) * (actions == greedy))
+        return actions
+
+    def __getitem__(self, key):
+        return self.inner[key]
+
+
+def test_vectorized_behavior_probs_match_sampling(monkeypatch):
+    recorders, received = [], []
+    behavior_policy = mc.behavior_policy
+
+    def recording_behavior_policy(behavior, target):
+        recorder = RecordingBehavior(behavior_policy(behavior, target))
+        recorders.append(recorder)
+        return recorder
+
+    def recording_update(*args):
+        received.append(np.array(args[7]))
+        off_policy_update(*args)
+
+    monkeypatch.setattr(mc, "behavior_policy", recording_behavior_policy)
+    monkeypatch.setattr(mc, "off_policy_update", recording_update)
+    mc.off_policy_mc_control(GridWorldEnv(5, 5), episodes=300, max_steps=50, num_envs=16, behavior=0.3, seed=0)
+
+    sampled = np.sort(np.concatenate(recorders[0].sampled))
+    assert len(sampled) > 1000
+    assert np.array_equal(np.sort(np.concatenate(received)), sampled)
+
+
+if __name__ == "__main__":
+    test_weighted_update_matches_reference_loop()
+    test_estimators_stay_finite_on_long_episodes()
+    print("OK")
@@ -0,0 +1,70 @@
+import numpy as np
+
+from agents.policies import CumulativeSampler, EpsilonGreedyCache, TabularPolicy
+from agents.random_stream import RandomStream
+
+PROBS = np.array([[0.1, 0.6, 0.0, 0.3],
+                  [0.0, 0.0, 1.0, 0.0],
+                  [2.0, 1.0, 1.0, 0.0]])  # ligne non normalisée : comme np.random.choice après normalisation
+
+
+def frequencies(draws, num_actions=4):
+    return np.bincount(draws, minlength=num_actions) / len(draws)
+
+
+def test_cumulative_sampler_matches_probabilities():
+    sampler, rng = CumulativeSampler(PROBS), RandomStream(0)
+    for s, row in enumerate(PROBS):
+        draws = [sampler.sample(s, rng) for _ in range(20000)]
+        assert np.allclose(frequencies(draws), row / row.sum(), atol=0.015)
+        assert np.all(frequencies(draws)[row == 0] == 0)
+
+    # update ne resynchronise que les lignes données
+    sampler.update(np.array([1]), np.array([[0.0, 0.5, 0.0, 0.5]]))
+    assert np.allclose(frequencies([sampler.sample(1, rng) for _ in range(20000)]), [0, 0.5, 0, 0.5], atol=0.015)
+    assert np.all(np.array([sampler.sample(0, rng) for _ in range(1000)]) != 2)
+
+
+def test_samplers_are_seed_reproducible():
+    sampler = CumulativeSampler(PROBS)
+    first, second = RandomStream(5), RandomStream(5)
+    assert [sampler.sample(0, first) for _ in range(100)] == [sampler.sample(0, second) for _ in range(100)]
+
+
+def test_tabular_policy_sampling_matches_probabilities():
+    policy, rng = TabularPolicy(PROBS), RandomStream(1)
+    states = np.repeat(np.arange(len(PROBS)), 20000)
+    draws = policy.sample(states, rng)
+    for s, row in enumerate(PROBS):
+        assert np.allclose(frequencies(draws[states == s]), row / row.sum(), atol=0.015)
+    assert np.allclose(frequencies([policy.sample(0, rng) for _ in range(20000)]), PROBS[0], atol=0.015)
+    assert np.array_equal(policy.sample(np.zeros(100, dtype=int), RandomStream(5)),
+                          policy.sample(np.zeros(100, dtype=int), RandomStream(5)))
+
+
+def epsilon_greedy_rows(Q, epsilon):
+    rows = np.full(Q.shape, epsilon / Q.shape[1])
+    rows[np.arange(len(Q)), np.argmax(Q, axis=1)] += 1.0 - epsilon
+    return rows
+
+
+def test_epsilon_greedy_cache_tracks_q():
+    rng = np.random.default_rng(2)
+    Q = rng.normal(size=(6, 3))
+    cache = EpsilonGreedyCache(Q, 0.2, RandomStream(0))
+    for _ in range(50):
+        states = rng.choice(6, 2, replace=False)
+        Q[states] += rng.normal(size=(2, 3))
+        cache.refresh(Q, states)
+        assert np.allclose(cache.probs, epsilon_greedy_rows(Q, 0.2))
+    assert np.allclose(np.asarray(cache.policy()), cache.probs)
+    for s in range(6):
+        assert np.isclose(cache.expected_value(Q, s), epsilon_greedy_rows(Q, 0.2)[s] @ Q[s])
+        draws = [cache.sample(s) for _ in range(20000)]
+        assert np.allclose(frequencies(draws, 3), cache.probs[s], atol=0.015)
+
+
+def test_epsilon_greedy_cache_is_seed_reproducible():
+    Q = np.random.default_rng(3).normal(size=(4, 3))
+    first, second = EpsilonGreedyCache(Q, 0.5, RandomStream(9)), EpsilonGreedyCache(Q, 0.5, RandomStream(9))
+    assert [first.sample(s % 4) for s in range(200)] == [second.sample(s % 4) for s in range(200)]
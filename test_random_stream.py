@@ -0,0 +1,47 @@
+import numpy as np
+
+from agents.planning_methods import dyna_q
+from agents.random_stream import RandomStream
+from agents.temporal_difference_methods import q_learning, sarsa
+from environments.grid_world_env import GridWorldEnv
+
+
+def test_scalar_draws_follow_the_generator():
+    # Les uniformes scalaires sont ceux du générateur, servis par blocs (ici 3 blocs entamés)
+    stream = RandomStream(0, block_size=64)
+    draws = [stream.random() for _ in range(150)]
+    expected = np.random.default_rng(0).random(192)[:150]
+    assert np.array_equal(draws, expected)
+
+
+def test_draws_are_uniform():
+    stream = RandomStream(1, block_size=100)
+    u = np.array([stream.random() for _ in range(50000)])
+    assert u.min() >= 0.0 and u.max() < 1.0
+    assert np.allclose(np.histogram(u, bins=10, range=(0, 1))[0] / len(u), 0.1, atol=0.01)
+    for high in (1, 3, 7):
+        draws = [stream.integers(high) for _ in range(30000)]
+        assert np.allclose(np.bincount(draws, minlength=high) / len(draws), 1 / high, atol=0.015)
+        assert np.allclose(np.bincount(stream.integers(high, size=30000), minlength=high) / 30000, 1 / high,
+                           atol=0.015)
+    assert stream.random(size=(2, 3)).shape == (2, 3)
+
+
+def test_streams_are_seed_reproducible():
+    first, second = RandomStream(4), RandomStream(4)
+    assert [first.integers(5) for _ in range(100)] == [second.integers(5) for _ in range(100)]
+    # Sans graine : graine tirée du générateur global
+    np.random.seed(0)
+    first = [RandomStream().random() for _ in range(3)]
+    np.random.seed(0)
+    assert first == [RandomStream().random() for _ in range(3)]
+
+
+def test_agents_are_seed_reproducible():
+    # Même graine : mêmes épisodes (longueurs) et même Q ; autre graine : autres épisodes
+    for agent in (sarsa, q_learning, dyna_q):
+        _, Q, steps = agent(GridWorldEnv(), episodes=30, seed=2)
+        _, Q_again, steps_again = agent(GridWorldEnv(), episodes=30, seed=2)
+        _, _, steps_other = agent(GridWorldEnv(), episodes=30, seed=3)
+        assert np.array_equal(Q, Q_again) and list(steps) == list(steps_again)
+        assert list(steps) != list(steps_other)
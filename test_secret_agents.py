@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from agents.random_stream import RandomStream
+from agents_for_secret_envs.monte_carlo_methods import (_greedy_action, monte_carlo_es, off_policy_mc_control,
+                                                        on_policy_first_visit_mc_control)
+from agents_for_secret_envs.planning_methods import dyna_q, dyna_q_plus
+from agents_for_secret_envs.temporal_difference_methods import expected_sarsa, q_learning, sarsa
+from environments.grid_world_env import GridWorldEnv
+
+
+class SecretGrid:
+    # GridWorld derrière l'interface de SecretEnvX (num_states(), state_id, available_actions, score) ; les
+    # actions jouées après chaque reset / repositionnement sont relevées
+    def __init__(self, rewards=None):
+        self.grid = GridWorldEnv()
+        if rewards is not None:
+            self.grid.rewards = rewards
+        self.episodes = []
+
+    def num_states(self):
+        return self.grid.num_states
+
+    def num_actions(self):
+        return self.grid.num_actions
+
+    def reset(self):
+        self.episodes.append([])
+        self.grid.reset()
+
+    def reset_to(self, state_index, action):
+        self.episodes.append([])
+        self.grid.reset_to(state_index, action)
+
+    def step(self, action):
+        self.episodes[-1].append(int(action))
+        self.grid.step(int(action))
+
+    def state_id(self):
+        return self.grid.get_state()
+
+    def score(self):
+        return self.grid.score()
+
+    def is_game_over(self):
+        return self.grid.is_game_over()
+
+    def available_actions(self):
+        return np.array([], dtype=int) if self.is_game_over() else np.arange(self.grid.num_actions)
+
+
+def test_greedy_action_breaks_ties_at_random():
+    rng = RandomStream(0)
+    actions = np.array([0, 2, 3])
+    draws = [_greedy_action(np.zeros(4), actions, rng) for _ in range(3000)]
+    assert np.allclose(np.bincount(draws, minlength=4)[actions] / 3000, 1 / 3, atol=0.03)
+    assert {_greedy_action(np.array([0.0, 5.0, 1.0, 5.0]), np.array([0, 2]), rng) for _ in range(50)} == {2}
+
+
+def test_monte_carlo_es_explores_while_q_is_flat():
+    # Récompenses nulles : Q reste nul, les actions après le départ ne doivent pas toutes être la première
+    env = SecretGrid(rewards={(0, 4): 0.0, (4, 4): 0.0})
+    monte_carlo_es(env, episodes=30, max_steps=20, seed=0)
+    followups = [a for episode in env.episodes for a in episode[1:]]
+    assert np.allclose(np.bincount(followups, minlength=4) / len(followups), 0.25, atol=0.05)
+
+
+def test_monte_carlo_es_is_seed_reproducible():
+    _, Q = monte_carlo_es(SecretGrid(), episodes=200, seed=3)
+    _, Q_again = monte_carlo_es(SecretGrid(), episodes=200, seed=3)
+    assert np.array_equal(Q, Q_again)
+
+
+@pytest.mark.parametrize("agent", [on_policy_first_visit_mc_control, off_policy_mc_control, sarsa, q_learning,
+                                   expected_sarsa, dyna_q, dyna_q_plus])
+def test_agents_are_seed_reproducible(agent):
+    # Mêmes trajectoires à graine égale, quel que soit l'état du générateur global
+    runs = []
+    for global_seed, seed in ((0, 5), (1, 5), (0, 6)):
+        np.random.seed(global_seed)
+        env = SecretGrid()
+        agent(env, episodes=20, seed=seed)
+        runs.append(env.episodes)
+    assert runs[0] == runs[1]
+    assert runs[0] != runs[2]
@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+from environments import secret_mdp_cache
+
+NUM_STATES, NUM_ACTIONS = 12, 2
+REWARDS = np.array([-1.0, 0.0, 1.0])
+# p(s, a, s', r) sur les états 0..7, 10 et 11 ; 8 et 9 sont terminaux, 10 et 11 ne sont successeurs de personne
+# (REACHABLE : états atteints depuis 0)
+_rng = np.random.default_rng(3)
+TABLE = {}
+for _s in list(range(8)) + [10, 11]:
+    for _a in range(NUM_ACTIONS):
+        _successors = _rng.choice(10, 2, replace=False)
+        _probs = _rng.dirichlet(np.ones(2))
+        TABLE[(_s, _a)] = [(int(s_p), int(_rng.integers(len(REWARDS))), float(p))
+                           for s_p, p in zip(_successors, _probs)]
+P = {(s, a, s_p, r): p for (s, a), rows in TABLE.items() for s_p, r, p in rows}
+
+
+def reachable_from(start):
+    seen, frontier = {start}, [start]
+    while frontier:
+        s = frontier.pop()
+        for a in range(NUM_ACTIONS):
+            for s_p, _, _ in TABLE.get((s, a), ()):
+                if s_p not in seen:
+                    seen.add(s_p)
+                    frontier.append(s_p)
+    return seen
+
+
+REACHABLE = reachable_from(0)
+
+
+class FakeSecretEnv:
+    # Même interface que SecretEnvX (p(), reset(), step(), score(), ...), dynamique tirée de TABLE
+    def __init__(self):
+        self.s, self._score = 0, 0.0
+        self.rng = np.random.default_rng()
+
+    def num_states(self):
+        return NUM_STATES
+
+    def num_actions(self):
+        return NUM_ACTIONS
+
+    def num_rewards(self):
+        return len(REWARDS)
+
+    def reward(self, i):
+        return float(REWARDS[i])
+
+    def p(self, s, a, s_p, r):
+        return P.get((s, a, s_p, r), 0.0)
+
+    def reset(self):
+        self.s, self._score = 0, 0.0
+
+    def state_id(self):
+        return self.s
+
+    def is_game_over(self):
+        return self.s in (8, 9)
+
+    def available_actions(self):
+        return np.arange(NUM_ACTIONS)
+
+    def score(self):
+        return self._score
+
+    def step(self, action):
+        rows = TABLE[(self.s, int(action))]
+        s_p, r, _ = rows[self.rng.choice(len(rows), p=[p for _, _, p in rows])]
+        self.s, self._score = s_p, self._score + REWARDS[r]
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(secret_mdp_cache, "library_hash", lambda lib_path=None: "test")
+    monkeypatch.setattr(secret_mdp_cache, "_loaded_models", {})
+    extractions = []
+    extract = secret_mdp_cache.extract_secret_mdp
+
+    def counting_extract(*args, **kwargs):
+        extractions.append(kwargs)
+        return extract(*args, **kwargs)
+
+    monkeypatch.setattr(secret_mdp_cache, "extract_secret_mdp", counting_extract)
+    return tmp_path, extractions
+
+
+def expected_rows(states):
+    probs, rewards = {}, np.zeros((NUM_STATES, NUM_ACTIONS))
+    for (s, a, s_p, r), p in P.items():
+        if s in states:
+            probs[(s, a, s_p)] = probs.get((s, a, s_p), 0.0) + p
+            rewards[s, a] += p * REWARDS[r]
+    return probs, rewards
+
+
+def model_rows(model):
+    rows = {}
+    for row in range(NUM_STATES * NUM_ACTIONS):
+        start, end = model.P.indptr[row], model.P.indptr[row + 1]
+        for s_p, p in zip(model.P.indices[start:end], model.P.data[start:end]):
+            rows[(*divmod(row, NUM_ACTIONS), int(s_p))] = float(p)
+    return rows
+
+
+def assert_rows_match(model, states):
+    probs, rewards = expected_rows(states)
+    rows = model_rows(model)
+    assert rows.keys() == probs.keys()
+    assert all(np.isclose(rows[key], p) for key, p in probs.items())
+    assert np.allclose(np.asarray(model.R)[list(states)], rewards[list(states)])
+
+
+def test_cache_round_trip_and_invalidation(cache):
+    cache_dir, extractions = cache
+    with pytest.warns(UserWarning, match=f"{NUM_STATES - len(REACHABLE)} états sur {NUM_STATES}"):
+        model = secret_mdp_cache.load_secret_mdp(FakeSecretEnv, workers=1, cache_dir=cache_dir, rollouts=50,
+                                                 max_steps=50)
+    assert len(extractions) == 1
+    assert_rows_match(model, REACHABLE)
+    assert set(np.flatnonzero(model.terminal)) == set(range(NUM_STATES)) - (REACHABLE - {8, 9})
+
+    # Relecture depuis le disque (nouveau processus simulé) : pas de nouvelle extraction, même modèle
+    secret_mdp_cache._loaded_models.clear()
+    with pytest.warns(UserWarning):
+        reloaded = secret_mdp_cache.load_secret_mdp(FakeSecretEnv, workers=1, cache_dir=cache_dir, rollouts=50,
+                                                    max_steps=50)
+    assert len(extractions) == 1
+    assert model_rows(reloaded) == model_rows(model)
+
+    # D'autres réglages d'exploration ne réutilisent pas ce modèle
+    with pytest.warns(UserWarning):
+        secret_mdp_cache.load_secret_mdp(FakeSecretEnv, workers=1, cache_dir=cache_dir, rollouts=80, max_steps=50)
+    assert len(extractions) == 2
+
+
+def test_scan_unreached_gives_exact_model(cache):
+    cache_dir, _ = cache
+    model = secret_mdp_cache.load_secret_mdp(FakeSecretEnv, workers=1, cache_dir=cache_dir, rollouts=5,
+                                             max_steps=3, scan_unreached=True)
+    assert_rows_match(model, set(range(NUM_STATES)))
+    assert list(np.flatnonzero(model.terminal)) == [8, 9]
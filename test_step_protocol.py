@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+import pytest
+
+from environments.grid_world_env import GridWorldEnv
+from environments.line_world_env import LineWorldEnv
+from environments.monty_hall_lv1_env import MontyHallEnv
+from environments.monty_hall_lv2_env import MontyHallEnvLv2
+from environments.rps_game_env import RPSGameEnv
+from environments.step_protocol import ScoreDiffStepAdapter, as_step_env
+
+
+def play(env, step, episodes, seed):
+    # Épisodes aux actions tirées parmi les actions valides ; le hasard de l'environnement est ré-ensemencé
+    # à chaque épisode pour que deux instances suivent la même dynamique
+    rng = np.random.default_rng(seed)
+    transitions = []
+    for episode in range(episodes):
+        random.seed(episode)
+        np.random.seed(episode)
+        env.reset()
+        s, done = env.get_state(), env.is_game_over()
+        while not done:
+            state = env.index_to_state[s] if hasattr(env, "index_to_state") else s
+            actions = list(env.get_actions(state))
+            s, r, done = step(actions[rng.integers(len(actions))])
+            transitions.append((s, r, done))
+    return transitions
+
+
+@pytest.mark.parametrize("env_cls", [LineWorldEnv, GridWorldEnv, MontyHallEnv, MontyHallEnvLv2, RPSGameEnv])
+def test_step_transition_matches_score_difference(env_cls):
+    random.seed(0)
+    env = env_cls()
+    assert as_step_env(env) is env
+    native = play(env, env.step_transition, 30, seed=1)
+
+    random.seed(0)
+    adapter = ScoreDiffStepAdapter(env_cls())
+    diffed = play(adapter, adapter.step_transition, 30, seed=1)
+    assert len(native) > 30
+    assert [s for s, _, _ in native] == [s for s, _, _ in diffed]
+    assert np.allclose([r for _, r, _ in native], [r for _, r, _ in diffed])
+    assert [done for _, _, done in native] == [done for _, _, done in diffed]
+
+
+class ScoreOnlyGrid:
+    # Interface de SecretEnvX : step / score / state_id, sans step_transition
+    def __init__(self):
+        self.grid = GridWorldEnv()
+
+    def __getattr__(self, name):
+        if name == "step_transition":
+            raise AttributeError(name)
+        return getattr(self.grid, name)
+
+    def state_id(self):
+        return self.grid.get_state()
+
+
+def test_as_step_env_wraps_score_only_envs():
+    env = as_step_env(ScoreOnlyGrid())
+    assert isinstance(env, ScoreDiffStepAdapter)
+    native = GridWorldEnv()
+    for start in (19, 6):
+        # Repositionnement : le score de référence est relu, la première récompense n'hérite pas de l'épisode
+        # précédent
+        env.reset_to(start, None)
+        native.reset_to(start, None)
+        for action in (3, 3, 1, 1, 3):
+            assert env.step_transition(action) == native.step_transition(action)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from agents.random_stream import RandomStream
+from environments.grid_world_env import GridWorldEnv
+from environments.line_world_env import LineWorldEnv
+from environments.vector_env import TabularVectorEnv, make_vector_env
+
+
+class SlipperyLine(LineWorldEnv):
+    # L'action choisie réussit avec probabilité 0.7, l'action opposée est jouée sinon
+    def get_transitions(self, state, action):
+        return [(0.7, *self.transition(state, action)), (0.3, *self.transition(state, 1 - action))]
+
+
+def test_vector_env_follows_deterministic_env():
+    rng = np.random.default_rng(0)
+    for env in (GridWorldEnv(), LineWorldEnv(length=9)):
+        venv = TabularVectorEnv(env, num_envs=1, rng=RandomStream(0))
+        for _ in range(50):
+            env.reset()
+            assert venv.reset()[0] == env.get_state()
+            done = False
+            while not done:
+                action = int(rng.integers(env.num_actions))
+                s_prime, r, done = env.step_transition(action)
+                states, rewards, terminal = venv.step(np.array([0]), np.array([action]))
+                assert (states[0], rewards[0], terminal[0]) == (s_prime, r, done)
+
+
+def test_vector_env_samples_transition_probabilities():
+    env = SlipperyLine()
+    venv = TabularVectorEnv(env, num_envs=20000, rng=RandomStream(1))
+    slots = np.arange(venv.num_envs)
+    venv.reset()
+    states, rewards, terminal = venv.step(slots, np.ones(venv.num_envs, dtype=int))
+    # Depuis l'état 2 : 3 avec probabilité 0.7, 1 sinon ; récompense espérée R[s, a] = 0 (aucun terminal atteint)
+    assert set(states) == {1, 3}
+    assert abs(np.mean(states == 3) - 0.7) < 0.02
+    assert not terminal.any() and np.all(rewards == 0.0)
+
+    # Depuis 3 : le terminal de droite (+1) avec probabilité 0.7
+    states, rewards, terminal = venv.step(slots[states == 3], np.ones(np.count_nonzero(states == 3), dtype=int))
+    assert abs(np.mean(states == 4) - 0.7) < 0.02
+    assert np.array_equal(terminal, states == 4)
+    assert np.allclose(rewards, 0.7 * 1.0)
+
+
+def test_vector_env_is_seed_reproducible():
+    runs = []
+    for _ in range(2):
+        venv = make_vector_env(SlipperyLine(), 100, RandomStream(3))
+        venv.reset()
+        runs.append(venv.step(np.arange(100), np.ones(100, dtype=int))[0])
+    assert np.array_equal(*runs)